@@ -1,69 +1,463 @@
-from flask import Flask, request
-from queue import Queue
-from services.webhook import send_webhook
+from flask import Flask, request, g, after_this_request
+from app_utils import TASK_REGISTRY, task_key, idempotency_key
+from services.job_broker import create_broker
+from services.job_store import JobStore, QUEUED, RUNNING, CANCELLED, ALREADY_CLAIMED
+from services.job_context import job_context, running_job_ids, cancel_running_job
+from services.file_management import remove_job_files
+from services.webhook import send_webhook, get_webhook_dispatcher
+from services.cost_model import CostModel, probe_media_duration
+from services.admission import AdmissionDenied, RESOURCE_RETRY_AFTER, check_resources, check_endpoint_limit, estimate_disk_bytes
+from services.quotas import RateLimiter, check_rate, check_queued_quota, quota_headers, policy_for
+from services.metrics import record_job
+from services.profiling import profile_requested, profiled, upload_profile
+from services.time_limits import job_limits, watch_time_limits
+from services.process_pool import ProcessPool, PROCESS_POOL_WORKERS, PROCESS_POOL_LANES
+from services.fast_json import FastJSONProvider
 import threading
+import logging
+from contextlib import nullcontext
+import math
 import uuid
 import os
 import time
+from blueprints import register_blueprints
 from version import BUILD_NUMBER  # 🔢 Import the BUILD_NUMBER
 
 MAX_QUEUE_LENGTH = int(os.environ.get('MAX_QUEUE_LENGTH', 0))  # 🚦 Maximum tasks allowed in queue
+QUEUE_WORKERS = max(int(os.environ.get('QUEUE_WORKERS', 1)), 1)  # 🧵 Consumer threads processing the queue in each worker
+
+# 🛣️ Execution lanes: each lane has its own queue and its own number of consumer threads
+QUEUE_LANES = {
+    'io': max(int(os.environ.get('IO_QUEUE_WORKERS', 4)), 1),  # 📡 Jobs that only move bytes (uploads, tests)
+    'cpu': QUEUE_WORKERS,  # 🎬 FFmpeg transcodes and renders
+    'heavy': max(int(os.environ.get('HEAVY_QUEUE_WORKERS', 1)), 1),  # 🧠 Whisper transcription and caption burns
+}
+# 🧮 Each consumer of a pool lane waits on one pool process, so those lanes get at least one consumer per process
+QUEUE_LANES.update({lane: max(QUEUE_LANES[lane], PROCESS_POOL_WORKERS) for lane in PROCESS_POOL_LANES if lane in QUEUE_LANES})
+DEFAULT_LANE = 'cpu'
+
+# 🗄️ Queue broker: 'local' keeps jobs inside each gunicorn worker, 'sqlite' shares them between all workers
+QUEUE_BROKER = os.environ.get('QUEUE_BROKER', 'local')
+QUEUE_BROKER_PATH = os.environ.get('QUEUE_BROKER_PATH', '/tmp/ciberfobia-api/queue.db')
+# 📝 Persistent journal of queued jobs, replayed on startup if their worker died
+JOB_STORE_PATH = os.environ.get('JOB_STORE_PATH', '/tmp/ciberfobia-api/jobs.db')
+JOB_RETENTION_HOURS = float(os.environ.get('JOB_RETENTION_HOURS', 168))  # 🧹 How long finished jobs stay in the journal
+# 🔁 Attach identical payloads to the in-flight job even without an Idempotency-Key header
+COALESCE_IDENTICAL_JOBS = os.environ.get('COALESCE_IDENTICAL_JOBS', 'true').lower() in ('1', 'true', 'yes')
+
+CANCEL_POLL_INTERVAL = 1.0  # 🛑 Seconds between checks for cancellations requested through another worker
+CANCELLED_CODE = 499  # 🛑 Code reported to the webhook for cancelled jobs (client closed request)
+TIME_LIMIT_CODE = 408  # ⏲️ Code of jobs stopped for exceeding their time limit, as /v1/code/execute/python reports its timeouts
+
+RUN_TIME_SMOOTHING = 0.3  # 📈 Weight of the latest run_time in the moving averages used for ETAs and deadline checks
+QUOTA_RETRY_DELAY = 1.0  # 👥 Seconds before a job whose API key is at max_running goes back into the queue
+
+# 🚪 Seconds a draining worker waits for its running jobs before giving up on them (they are replayed from the journal)
+DRAIN_GRACE_SECONDS = float(os.environ.get('DRAIN_GRACE_SECONDS', 120))
+DRAIN_POLL_INTERVAL = 1.0  # 🚪 Seconds between checks while draining, and longest a consumer blocks before noticing a drain
+ORPHAN_SWEEP_INTERVAL = 30  # ♻️ Seconds between two looks for jobs left behind by workers that died after this one started
+
+logger = logging.getLogger(__name__)
 
 def create_app():
     app = Flask(__name__)
+    app.json = FastJSONProvider(app)  # ⚡ orjson for request bodies and JSON responses when it is installed
+
+    # 📝 Open the job journal and drop old finished jobs
+    job_store = JobStore(JOB_STORE_PATH)
+    job_store.prune(JOB_RETENTION_HOURS * 3600)
+
+    # 📥 Create the broker holding one priority/deadline-ordered queue per lane
+    broker = create_broker(QUEUE_BROKER, QUEUE_LANES, QUEUE_BROKER_PATH)
+    queue_id = id(broker)  # 🔢 Generate a unique queue_id for this worker
+
+    # 📊 Per-lane scheduling statistics used to check deadlines up front
+    lane_stats_lock = threading.Lock()
+    busy_workers = {lane: 0 for lane in QUEUE_LANES}
+    average_run_time = {lane: None for lane in QUEUE_LANES}
+    claimed_jobs = {lane: 0 for lane in QUEUE_LANES}  # 🚪 Jobs taken from the queue and not finished yet, awaited by a drain
+
+    # 🚪 Drain state: a draining worker takes no new queued jobs and its consumers stop claiming work
+    draining = threading.Event()
+    drain_requested = threading.Event()  # 🚪 Draining because of POST /v1/toolkit/drain, undone when it is withdrawn
+    shutting_down = threading.Event()  # 🚪 Draining because the worker exits, never undone
+
+    def queue_length():
+        """📏 Total number of tasks waiting across all lanes (in every worker when the broker is shared)"""
+        return broker.qsize()
+
+    # 📈 Seconds of run_time per second of media for each endpoint, learned from finished jobs
+    cost_model = CostModel(JOB_STORE_PATH, RUN_TIME_SMOOTHING)
+
+    # 🪣 Request rate of every API key, shared by all workers
+    rate_limiter = RateLimiter(JOB_STORE_PATH)
+
+    # 🧮 Optional processes running the jobs of CPU-bound lanes outside of this worker's GIL
+    process_pool = ProcessPool(PROCESS_POOL_WORKERS, preload_model=os.environ.get('PRELOAD_WHISPER_MODEL') or None) if PROCESS_POOL_WORKERS > 0 else None
+
+    def estimate_times(lane, priority, deadline, endpoint, media_duration):
+        """⏱️ Estimate when a new job would start and finish, or (None, None) with no run history yet"""
+        with lane_stats_lock:
+            lane_run_time = average_run_time[lane]
+            busy = busy_workers[lane]
+        # 🔮 This job's own run time comes from the endpoint cost model when its media was probed
+        run_time = cost_model.predict(endpoint, media_duration) or lane_run_time
+        if run_time is None:
+            return None, None
+        ahead = broker.jobs_ahead(lane, priority, deadline) + busy
+        start = time.time() + (ahead / QUEUE_LANES[lane]) * (lane_run_time or run_time)
+        return start, start + run_time
 
-    # 📥 Create a queue to hold tasks
-    task_queue = Queue()
-    queue_id = id(task_queue)  # 🔢 Generate a unique queue_id for this worker
+    # 🔄 Run one queued job, journal its outcome and send the result via webhook
+    def run_job(job, lane, worker_id):
+        job_id, endpoint, data, queue_start_time = job["job_id"], job["endpoint"], job["data"], job["queue_start_time"]
+        task_func = TASK_REGISTRY.get(job["task_key"])
+        queue_time = time.time() - queue_start_time  # ⏳ Calculate time spent in queue
+        run_start_time = time.time()  # ⏱️ Start time for processing
+        pid = os.getpid()  # 🖥️ Get the PID of the processing thread
+        deadline = data.get("deadline")
 
-    # ⏱️ Function to process tasks from the queue in a separate thread
-    def process_queue():
+        # 📝 Journal the start so a crash leaves a replayable record
+        state = job_store.record_running(job_id, max_running=policy_for(job.get("api_key")).get("max_running"))
+        if state == QUEUED:
+            # 👥 Its API key already runs max_running jobs: requeue it shortly and let this consumer serve other clients
+            timer = threading.Timer(QUOTA_RETRY_DELAY, broker.put, args=(job,))
+            timer.daemon = True
+            timer.start()
+            return
+        if state == ALREADY_CLAIMED:
+            logger.info(f"Job {job_id}: Already started by another consumer, skipping")
+            return
+        if state != RUNNING:
+            logger.info(f"Job {job_id}: Cancelled while queued, skipping")
+            return
+
+        cancelled = False
+        timed_out = None
+        stages = {}
+        profile = {"path": None}
+        if deadline is not None and run_start_time > deadline:
+            # ⌛ The deadline passed while waiting: skip the job instead of running it late
+            response = ("Deadline passed before the job could start", endpoint, 408)
+        elif task_func is None:
+            response = (f"Unknown task {job['task_key']}", endpoint, 500)
+        else:
+            with lane_stats_lock:
+                busy_workers[lane] += 1
+            try:
+                # 📊 Let services report progress; the app context lets tasks such as pipelines look up other routes
+                with app.app_context(), job_context(job_id, on_progress=job_store.record_progress) as context:
+                    context.profiling = job.get("profile", False)
+                    context.run_time_limit, context.cpu_time_limit = job_limits(endpoint, data)  # ⏲️ Enforced by the watchdog
+                    context.measure_media = job.get("media_duration") is None
+                    if process_pool is not None and lane in PROCESS_POOL_LANES:
+                        # 🧮 Run it in a pool process, which also profiles it there when asked
+                        response, profile = process_pool.run(job, context)
+                    else:
+                        with profiled(job_id) if context.profiling else nullcontext(profile) as profile:
+                            try:
+                                response = task_func(job_id=job_id, data=data, **job["kwargs"])  # 🔄 Execute the task
+                            except Exception as e:
+                                if not context.cancelled.is_set():
+                                    logger.exception(f"Job {job_id}: Unhandled error in {endpoint}")
+                                response = (str(e), endpoint, 500)
+                timed_out = context.timed_out
+                cancelled = context.cancelled.is_set() and timed_out is None
+                stages = context.stage_times()  # ⏱️ Where the run_time went
+                if response[2] == 200 and not cancelled and not timed_out and context.stage != 'cache':
+                    # 📈 Cache hits cost nothing and would drag the model towards zero
+                    cost_model.observe(endpoint, job.get("media_duration") or context.media_duration, time.time() - run_start_time)
+                if cancelled:
+                    # 🛑 Whatever the task returned, the job was cancelled: drop its temporary files
+                    response = ("cancelled", endpoint, CANCELLED_CODE)
+                    removed = remove_job_files(job_id, context.files)
+                    logger.info(f"Job {job_id}: Cancelled while running, removed {removed} temporary files")
+                elif timed_out:
+                    # ⏲️ The watchdog killed it: fail the job with the limit it went over
+                    response = (timed_out, endpoint, TIME_LIMIT_CODE)
+                    removed = remove_job_files(job_id, context.files)
+                    logger.info(f"Job {job_id}: Stopped by the time limit watchdog, removed {removed} temporary files")
+            finally:
+                with lane_stats_lock:
+                    busy_workers[lane] -= 1
+                    if not cancelled and not timed_out:
+                        elapsed = time.time() - run_start_time
+                        previous = average_run_time[lane]
+                        average_run_time[lane] = elapsed if previous is None else previous + RUN_TIME_SMOOTHING * (elapsed - previous)
+        run_time = time.time() - run_start_time  # ⏲️ Calculate task run time
+        total_time = time.time() - queue_start_time  # ⏳ Total time (queue + run)
+        profile_url = upload_profile(profile["path"])  # 🔬 Stored next to the outputs; after run_time so it is not counted
+
+        response_data = {
+            "endpoint": response[1],
+            "code": response[2],
+            "id": data.get("id"),
+            "job_id": job_id,
+            "response": response[0] if response[2] == 200 else None,
+            "message": "success" if response[2] == 200 else response[0],
+            "pid": pid,
+            "queue_id": queue_id,
+            "lane": lane,
+            "worker_id": worker_id,
+            "run_time": round(run_time, 3),
+            "queue_time": round(queue_time, 3),
+            "total_time": round(total_time, 3),
+            "stages": stages,
+            "queue_length": queue_length(),
+            "lane_queue_length": broker.qsize(lane),
+            "build_number": BUILD_NUMBER  # 🏗️ Add build number to response
+        }
+        if job.get("profile"):
+            response_data["profile_url"] = profile_url
+
+        job_store.record_finished(job_id, response_data, state=CANCELLED if cancelled else None)  # 📝 Journal the final outcome
+        record_job(response[1], lane, response[2], run_time, queue_time, stages)  # 📈 Feed /metrics
+        notify(job_id, data, response_data)  # 🔔 Send result via webhook
+
+    # 🔔 Send the outcome of a job to its webhook and to every duplicate request attached to it
+    def notify(job_id, data, response_data):
+        send_webhook(data.get("webhook_url"), response_data)
+        for subscriber in job_store.subscribers(job_id):
+            send_webhook(subscriber["webhook_url"], {**response_data, "id": subscriber["id"], "attached": True})
+        # 📦 The last job of a batch also sends the batch summary
+        summary = job_store.complete_batch_item(job_id)
+        if summary is not None:
+            send_webhook(summary.pop("webhook_url"), {"code": 200, "message": "batch finished", **summary, "build_number": BUILD_NUMBER})
+
+    # 🛑 Journal the cancelled response of a job that will never run (again) and tell its clients
+    def finish_cancelled(job):
+        response_data = {
+            "endpoint": job["endpoint"],
+            "code": CANCELLED_CODE,
+            "id": job["data"].get("id"),
+            "job_id": job["job_id"],
+            "response": None,
+            "message": "cancelled",
+            "pid": os.getpid(),
+            "queue_id": queue_id,
+            "lane": job["lane"],
+            "queue_time": round(time.time() - job["queue_start_time"], 3),
+            "build_number": BUILD_NUMBER  # 🏗️ Add build number to response
+        }
+        job_store.record_finished(job["job_id"], response_data, state=CANCELLED)
+        notify(job["job_id"], job["data"], response_data)  # 🔔 Tell the clients it will never run
+
+    # 🛑 Cancel a job: drop it if still queued, otherwise ask the worker running it to stop. Returns the state it had
+    def cancel_job(job_id, client=None):
+        state, job = job_store.request_cancel(job_id, client)
+        if state == QUEUED:
+            broker.remove(job_id)  # 🗑️ Consumers also skip it, in case it sits in another worker's local queue
+            finish_cancelled(job)
+        elif state == RUNNING:
+            cancel_running_job(job_id)  # ⚡ Immediate when running here, otherwise its worker picks the flag up
+        return state
+
+    # 🤝 Release the jobs still waiting in this worker's queue to the other workers
+    def hand_off_pending():
+        jobs = broker.take_all()
+        if jobs:
+            job_store.hand_off([job["job_id"] for job in jobs])
+            logger.info(f"Handed off {len(jobs)} queued jobs to the other workers")
+
+    # 🚪 Stop taking queued jobs, hand the pending ones over and wait up to grace_period for the running ones
+    def drain(grace_period=DRAIN_GRACE_SECONDS, heartbeat=None):
+        with lane_stats_lock:
+            draining.set()
+        logger.info(f"Draining worker {os.getpid()}: waiting up to {grace_period:.0f}s for running jobs")
+        give_up = time.time() + grace_period
         while True:
-            job_id, data, task_func, queue_start_time = task_queue.get()  # 📥 Get task from queue
-            queue_time = time.time() - queue_start_time  # ⏳ Calculate time spent in queue
-            run_start_time = time.time()  # ⏱️ Start time for processing
-            pid = os.getpid()  # 🖥️ Get the PID of the processing thread
-            response = task_func()  # 🔄 Execute the task
-            run_time = time.time() - run_start_time  # ⏲️ Calculate task run time
-            total_time = time.time() - queue_start_time  # ⏳ Total time (queue + run)
-
-            response_data = {
-                "endpoint": response[1],
-                "code": response[2],
-                "id": data.get("id"),
-                "job_id": job_id,
-                "response": response[0] if response[2] == 200 else None,
-                "message": "success" if response[2] == 200 else response[0],
-                "pid": pid,
-                "queue_id": queue_id,
-                "run_time": round(run_time, 3),
-                "queue_time": round(queue_time, 3),
-                "total_time": round(total_time, 3),
-                "queue_length": task_queue.qsize(),
-                "build_number": BUILD_NUMBER  # 🏗️ Add build number to response
-            }
+            hand_off_pending()
+            with lane_stats_lock:
+                running = sum(claimed_jobs.values())
+            if running == 0 or time.time() >= give_up:
+                break
+            if heartbeat is not None:
+                heartbeat()  # 💓 Keep gunicorn from killing the worker as unresponsive while it waits
+            time.sleep(DRAIN_POLL_INTERVAL)
+        if running:
+            logger.warning(f"Drain grace period over with {running} jobs still running; another worker will replay them from the job store")
+        else:
+            logger.info(f"Worker {os.getpid()} drained")
+        return running == 0
+
+    # 🚪 Drain before the worker exits (SIGTERM, max_requests recycling), called by the gunicorn worker_exit hook
+    def shutdown(grace_period=DRAIN_GRACE_SECONDS, heartbeat=None):
+        shutting_down.set()
+        return drain(grace_period, heartbeat)
+
+    # 🚪 Follow the drain request of POST /v1/toolkit/drain and pick up jobs handed off by draining workers
+    def follow_drain_request():
+        requested_at = job_store.drain_requested_at()
+        if requested_at is not None and requested_at >= job_store.started_at and not drain_requested.is_set():
+            drain_requested.set()
+            threading.Thread(target=drain, name="queue-drain", daemon=True).start()
+        elif requested_at is None and drain_requested.is_set():
+            drain_requested.clear()
+            if not shutting_down.is_set():
+                draining.clear()
+                logger.info(f"Drain withdrawn, worker {os.getpid()} takes queued jobs again")
+        if draining.is_set():
+            hand_off_pending()  # 📤 Jobs requeued after the drain started (e.g. quota retries) go to the other workers too
+        else:
+            for job in job_store.claim_handoffs(sum(QUEUE_LANES.values())):
+                broker.put(job)
 
-            send_webhook(data.get("webhook_url"), response_data)  # 🔔 Send result via webhook
+    # ♻️ Replay unfinished jobs left behind by workers that died (timeouts, OOM kills, redeploys).
+    # A shared broker still holds the queued jobs nobody claimed; the ones a dead worker had taken out of it are replayed.
+    def replay_orphans():
+        replayed_jobs, cancelled_jobs = job_store.claim_orphans(broker.queued_ids() if broker.shared else ())
+        for job in replayed_jobs:
+            broker.put(job)
+        for job in cancelled_jobs:
+            finish_cancelled(job)  # 🛑 Its worker died while stopping it
+        if replayed_jobs or cancelled_jobs:
+            logger.info(f"Replayed {len(replayed_jobs)} unfinished jobs from the job store and finished {len(cancelled_jobs)} cancelled ones")
 
-            task_queue.task_done()  # ✅ Mark task as done
+    # 👀 Stop local jobs whose cancellation was requested through another worker, follow drain requests
+    # and replay the jobs of workers that died while this one runs (e.g. old workers of a rolling deploy)
+    def watch_cancellations():
+        next_sweep = time.monotonic() + ORPHAN_SWEEP_INTERVAL
+        while True:
+            time.sleep(CANCEL_POLL_INTERVAL)
+            try:
+                for job_id in job_store.cancel_requested(running_job_ids()):
+                    cancel_running_job(job_id)
+            except Exception:
+                logger.exception("Cancellation watcher failed to poll the job store")
+            try:
+                follow_drain_request()
+            except Exception:
+                logger.exception("Drain watcher failed to poll the job store")
+            if time.monotonic() >= next_sweep and not draining.is_set():
+                next_sweep = time.monotonic() + ORPHAN_SWEEP_INTERVAL
+                try:
+                    replay_orphans()
+                except Exception:
+                    logger.exception("Orphan sweep failed to read the job store")
+
+    # ⏱️ Function to process tasks from a lane queue in a separate thread
+    def process_queue(lane, worker_id):
+        while True:
+            if draining.is_set():
+                time.sleep(DRAIN_POLL_INTERVAL)  # 🚪 A draining worker claims no more jobs
+                continue
+            job = broker.get(lane, timeout=DRAIN_POLL_INTERVAL)  # 📥 Get next task by priority and deadline
+            if job is None:
+                continue
+            with lane_stats_lock:
+                held_back = draining.is_set()
+                if not held_back:
+                    claimed_jobs[lane] += 1
+            if held_back:
+                # 🚪 The drain started while this consumer waited: put the job back for the hand-off
+                broker.put(job)
+                broker.task_done(lane)
+                continue
+            try:
+                run_job(job, lane, worker_id)
+            except Exception:
+                logger.exception(f"Job {job['job_id']}: Queue worker {lane}-{worker_id} failed to process the job")
+            finally:
+                with lane_stats_lock:
+                    claimed_jobs[lane] -= 1
+                broker.task_done(lane)  # ✅ Mark task as done
 
-    # 🧵 Start the queue processing in a separate daemon thread
-    threading.Thread(target=process_queue, daemon=True).start()
+    # 🧵 Start the configured number of daemon threads for every lane
+    for lane, lane_workers in QUEUE_LANES.items():
+        for worker_id in range(lane_workers):
+            threading.Thread(target=process_queue, args=(lane, worker_id), name=f"queue-{lane}-{worker_id}", daemon=True).start()
+    threading.Thread(target=watch_cancellations, name="queue-cancellations", daemon=True).start()
+    threading.Thread(target=watch_time_limits, name="job-watchdog", daemon=True).start()
+    get_webhook_dispatcher()  # 📮 Start webhook delivery now, so callbacks left in the outbox by a restart go out
+
+    def retry_after(lane):
+        """⏱️ Seconds a rejected client should wait: about one run of the lane, once there is history"""
+        with lane_stats_lock:
+            run_time = average_run_time[lane]
+        return max(math.ceil(run_time), 1) if run_time else RESOURCE_RETRY_AFTER
+
+    def client_quota(client):
+        """👥 Take a request token from the client's API key (AdmissionDenied when none is left) and report its remaining quota in the response headers"""
+        if not client.get("name"):
+            return
+        denied = None
+        try:
+            tokens = check_rate(rate_limiter, client)
+        except AdmissionDenied as e:
+            denied, tokens = e, 0
+
+        @after_this_request
+        def add_quota_headers(response):
+            response.headers.update(quota_headers(client, tokens, job_store.key_usage(client["name"])))
+            return response
+
+        if denied is not None:
+            raise denied
+
+    def admission_denied(denied, job_id, data, lane):
+        """🚫 Response for a request refused by admission control, with its Retry-After header"""
+        return {
+            "code": denied.code,
+            "id": data.get("id"),
+            "job_id": job_id,
+            "message": denied.message,
+            "retry_after": denied.retry_after,
+            "pid": os.getpid(),
+            "queue_id": queue_id,
+            "lane": lane,
+            "queue_length": queue_length(),
+            "lane_queue_length": broker.qsize(lane),
+            "build_number": BUILD_NUMBER  # 🏗️ Add build number to response
+        }, denied.code, {"Retry-After": str(denied.retry_after)}
 
     # 🚀 Decorator to add tasks to the queue or bypass it
-    def queue_task(bypass_queue=False):
+    def queue_task(bypass_queue=False, lane=DEFAULT_LANE):
+        if lane not in QUEUE_LANES:
+            raise ValueError(f"Unknown queue lane '{lane}'. Available lanes: {', '.join(QUEUE_LANES)}")
+
         def decorator(f):
             def wrapper(*args, **kwargs):
                 job_id = str(uuid.uuid4())  # 🆔 Generate a unique job ID
                 data = request.json if request.is_json else {}  # 📥 Get JSON payload
                 pid = os.getpid()  # 🖥️ Get PID for non-queued tasks
                 start_time = time.time()  # ⏱️ Start time for task execution
+                client = g.get("api_key") or {}  # 👥 API key policy set by authenticate
+
+                try:
+                    client_quota(client)
+                except AdmissionDenied as denied:
+                    return admission_denied(denied, job_id, data, lane)
+
+                # 🔬 Profiling exposes code internals, so only admin keys may ask for it
+                profile_job = profile_requested(request.headers)
+                if profile_job and not client.get("admin"):
+                    return {
+                        "code": 403,
+                        "id": data.get("id"),
+                        "job_id": job_id,
+                        "message": "Profiling requires an admin API key",
+                        "build_number": BUILD_NUMBER  # 🏗️ Add build number to response
+                    }, 403
                 
                 if bypass_queue or 'webhook_url' not in data:
-                    # ⚡ Process task immediately (bypassing the queue)
-                    response = f(job_id=job_id, data=data, *args, **kwargs)
+                    # 🚦 Synchronous requests still need disk, memory and CPU headroom
+                    try:
+                        check_resources(estimate_disk_bytes(data), job_store.reserved_disk_bytes())
+                    except AdmissionDenied as denied:
+                        return admission_denied(denied, job_id, data, lane)
+
+                    # ⚡ Process task immediately (bypassing the queue), in a job context so services can time their stages
+                    with job_context(job_id) as context:
+                        context.profiling = profile_job
+                        context.run_time_limit, context.cpu_time_limit = job_limits(request.path, data)
+                        with profiled(job_id) if profile_job else nullcontext({"path": None}) as profile:
+                            response = f(job_id=job_id, data=data, *args, **kwargs)
+                    if context.timed_out:
+                        response = (context.timed_out, request.path, TIME_LIMIT_CODE)
                     run_time = time.time() - start_time  # ⏲️ Calculate run time
-                    return {
+                    stages = context.stage_times()
+                    record_job(request.path, lane, response[2], run_time, 0, stages)  # 📈 Feed /metrics
+                    response_data = {
                         "code": response[2],
                         "id": data.get("id"),
                         "job_id": job_id,
@@ -72,27 +466,105 @@ def create_app():
                         "run_time": round(run_time, 3),
                         "queue_time": 0,
                         "total_time": round(run_time, 3),
+                        "stages": stages,
                         "pid": pid,
                         "queue_id": queue_id,
-                        "queue_length": task_queue.qsize(),
+                        "lane": lane,
+                        "queue_length": queue_length(),
                         "build_number": BUILD_NUMBER  # 🏗️ Add build number to response
-                    }, response[2]
+                    }
+                    if profile_job:
+                        response_data["profile_url"] = upload_profile(profile["path"])
+                    return response_data, response[2]
                 else:
-                    # 🚦 Check if queue has reached maximum length
-                    if MAX_QUEUE_LENGTH > 0 and task_queue.qsize() >= MAX_QUEUE_LENGTH:
+                    if draining.is_set():
+                        # 🚪 Rolling deploy in progress: the client retries and reaches a worker that is not draining
+                        return admission_denied(AdmissionDenied(503, "Worker is draining and accepts no new queued jobs", RESOURCE_RETRY_AFTER), job_id, data, lane)
+
+                    header_key = request.headers.get('Idempotency-Key')
+                    key = idempotency_key(request.path, data, header_key, client.get("name")) if header_key or COALESCE_IDENTICAL_JOBS else None
+                    if profile_job:
+                        key = None  # 🔬 A profile needs its own run, not the result of an identical in-flight job
+
+                    # 🚦 Admission control for new jobs (duplicates just attach): queue limits, then disk, memory and load headroom
+                    disk_bytes = 0
+                    media_duration = None
+                    if key is None or job_store.find_in_flight(key) is None:
+                        try:
+                            if MAX_QUEUE_LENGTH > 0 and queue_length() >= MAX_QUEUE_LENGTH:
+                                raise AdmissionDenied(429, f"MAX_QUEUE_LENGTH ({MAX_QUEUE_LENGTH}) reached", retry_after(lane))
+                            check_endpoint_limit(request.path, job_store.unfinished_jobs(request.path), retry_after(lane))
+                            if client.get("max_queued") is not None:
+                                check_queued_quota(client, job_store.key_usage(client["name"])[QUEUED], 1, retry_after(lane))
+                            disk_bytes = estimate_disk_bytes(data)
+                            check_resources(disk_bytes, job_store.reserved_disk_bytes())
+                        except AdmissionDenied as denied:
+                            return admission_denied(denied, job_id, data, lane)
+                        if data.get("max_wait") is not None or cost_model.has_history(request.path):
+                            # ⏱️ Seconds of media, for the estimates; other jobs measure their downloads once they run
+                            media_duration = probe_media_duration(data)
+
+                    priority = data.get("priority", 0)
+                    deadline = data.get("deadline")
+                    max_wait = data.get("max_wait")
+                    estimated_start, estimated_finish = estimate_times(lane, priority, deadline, request.path, media_duration)
+
+                    # 🕒 Shed jobs the client would rather not wait for
+                    if max_wait is not None and estimated_finish is not None and estimated_finish - start_time > max_wait:
+                        excess = estimated_finish - start_time - max_wait
+                        denied = AdmissionDenied(429, f"Predicted completion in {estimated_finish - start_time:.0f}s exceeds max_wait ({max_wait}s)", max(math.ceil(excess), 1))
+                        return admission_denied(denied, job_id, data, lane)
+
+                    # ⌛ Reject jobs that cannot finish before their deadline given the current lane depth
+                    if deadline is not None:
+                        if deadline <= start_time or (estimated_finish is not None and estimated_finish > deadline):
+                            return {
+                                "code": 422,
+                                "id": data.get("id"),
+                                "job_id": job_id,
+                                "message": "deadline cannot be met with the current queue depth",
+                                "estimated_finish_time": round(estimated_finish, 3) if estimated_finish else None,
+                                "pid": pid,
+                                "queue_id": queue_id,
+                                "lane": lane,
+                                "queue_length": queue_length(),
+                                "lane_queue_length": broker.qsize(lane),
+                                "build_number": BUILD_NUMBER  # 🏗️ Add build number to response
+                            }, 422
+                    
+                    # ⏳ Journal the task and put it into the queue; only serializable fields so any worker can run it
+                    job = {
+                        "job_id": job_id,
+                        "task_key": task_key(f),
+                        "endpoint": request.path,
+                        "lane": lane,
+                        "priority": priority,
+                        "deadline": deadline,
+                        "data": data,
+                        "kwargs": kwargs,
+                        "queue_start_time": start_time,
+                        "disk_bytes": disk_bytes,
+                        "media_duration": media_duration,
+                        "api_key": client.get("name"),
+                        "profile": profile_job
+                    }
+                    attached_job_id = job_store.record_queued(job, idempotency_key=key)
+                    if attached_job_id is not None:
+                        # 🔁 An identical job is already queued or running: its webhook will also be sent to this request
                         return {
-                            "code": 429,
+                            "code": 202,
                             "id": data.get("id"),
-                            "job_id": job_id,
-                            "message": f"MAX_QUEUE_LENGTH ({MAX_QUEUE_LENGTH}) reached",
+                            "job_id": attached_job_id,
+                            "message": "attached to in-flight job",
+                            "attached": True,
                             "pid": pid,
                             "queue_id": queue_id,
-                            "queue_length": task_queue.qsize(),
+                            "lane": lane,
+                            "queue_length": queue_length(),
+                            "lane_queue_length": broker.qsize(lane),
                             "build_number": BUILD_NUMBER  # 🏗️ Add build number to response
-                        }, 429
-                    
-                    # ⏳ Put task into the queue
-                    task_queue.put((job_id, data, lambda: f(job_id=job_id, data=data, *args, **kwargs), start_time))
+                        }, 202
+                    broker.put(job)
                     
                     return {
                         "code": 202,
@@ -102,56 +574,91 @@ def create_app():
                         "pid": pid,
                         "queue_id": queue_id,
                         "max_queue_length": MAX_QUEUE_LENGTH if MAX_QUEUE_LENGTH > 0 else "unlimited",
-                        "queue_length": task_queue.qsize(),
+                        "lane": lane,
+                        "queue_length": queue_length(),
+                        "lane_queue_length": broker.qsize(lane),
+                        "queue_workers": QUEUE_LANES[lane],
+                        "priority": priority,
+                        "deadline": deadline,
+                        "media_duration": media_duration,
+                        "estimated_start_time": round(estimated_start, 3) if estimated_start else None,
+                        "estimated_finish_time": round(estimated_finish, 3) if estimated_finish else None,
                         "build_number": BUILD_NUMBER  # 🏗️ Add build number to response
                     }, 202
             return wrapper
         return decorator
 
+    # 📦 Journal and enqueue many already-validated jobs at once
+    def submit_batch(items, webhook_url=None, request_id=None, client=None):
+        batch_id = str(uuid.uuid4())
+        start_time = time.time()
+        endpoint_counts = {}
+        for item in items:
+            endpoint_counts[item["endpoint"]] = endpoint_counts.get(item["endpoint"], 0) + 1
+
+        # 🚦 Admission control for the batch as a whole; inputs are not sized or probed one by one
+        client = client or {}
+        try:
+            if draining.is_set():
+                raise AdmissionDenied(503, "Worker is draining and accepts no new queued jobs", RESOURCE_RETRY_AFTER)
+            client_quota(client)
+            if MAX_QUEUE_LENGTH > 0 and queue_length() + len(items) > MAX_QUEUE_LENGTH:
+                raise AdmissionDenied(429, f"MAX_QUEUE_LENGTH ({MAX_QUEUE_LENGTH}) would be exceeded by {len(items)} jobs", RESOURCE_RETRY_AFTER)
+            for endpoint, count in endpoint_counts.items():
+                check_endpoint_limit(endpoint, job_store.unfinished_jobs(endpoint) + count - 1, RESOURCE_RETRY_AFTER)
+            if client.get("max_queued") is not None:
+                check_queued_quota(client, job_store.key_usage(client["name"])[QUEUED], len(items), RESOURCE_RETRY_AFTER)
+            check_resources(0, job_store.reserved_disk_bytes())
+        except AdmissionDenied as denied:
+            return {
+                "code": denied.code,
+                "id": request_id,
+                "message": denied.message,
+                "retry_after": denied.retry_after,
+                "build_number": BUILD_NUMBER  # 🏗️ Add build number to response
+            }, denied.code, {"Retry-After": str(denied.retry_after)}
+
+        jobs = [{
+            "job_id": str(uuid.uuid4()),
+            "task_key": item["task_key"],
+            "endpoint": item["endpoint"],
+            "lane": item["lane"],
+            "priority": item["data"].get("priority", 0),
+            "deadline": item["data"].get("deadline"),
+            "data": item["data"],
+            "kwargs": item["kwargs"],
+            "queue_start_time": start_time,
+            "disk_bytes": 0,
+            "media_duration": None,
+            "batch_id": batch_id,
+            "api_key": client.get("name")
+        } for item in items]
+        job_store.record_batch(batch_id, jobs, webhook_url, request_id)
+        broker.put_many(jobs)
+
+        return {
+            "code": 202,
+            "id": request_id,
+            "batch_id": batch_id,
+            "message": "processing",
+            "total": len(jobs),
+            "job_ids": [job["job_id"] for job in jobs],
+            "queue_length": queue_length(),
+            "build_number": BUILD_NUMBER  # 🏗️ Add build number to response
+        }, 202
+
     app.queue_task = queue_task  # ⚙️ Attach the queue_task decorator to the app
+    app.job_store = job_store  # 📝 Expose the job journal to the job status endpoints
+    app.cancel_job = cancel_job  # 🛑 Used by DELETE /v1/toolkit/jobs/<job_id>
+    app.submit_batch = submit_batch  # 📦 Used by POST /v1/toolkit/batch
+    app.drain = shutdown  # 🚪 Called by the gunicorn worker_exit hook in gunicorn.conf.py
+    app.draining = draining  # 🚪 Reported by /v1/toolkit/drain
+
+    # 📥 Register blueprints (API endpoints)
+    register_blueprints(app)
 
-    # 📥 Import blueprints (API endpoints)
-    from routes.media_to_mp3 import convert_bp
-    from routes.transcribe_media import transcribe_bp
-    from routes.combine_videos import combine_bp
-    from routes.audio_mixing import audio_mixing_bp
-    from routes.gdrive_upload import gdrive_upload_bp
-    from routes.authenticate import auth_bp
-    from routes.caption_video import caption_bp 
-    from routes.extract_keyframes import extract_keyframes_bp
-    from routes.image_to_video import image_to_video_bp
-    
-    # 🚀 Register blueprints
-    app.register_blueprint(convert_bp)
-    app.register_blueprint(transcribe_bp)
-    app.register_blueprint(combine_bp)
-    app.register_blueprint(audio_mixing_bp)
-    app.register_blueprint(gdrive_upload_bp)
-    app.register_blueprint(auth_bp)
-    app.register_blueprint(caption_bp)
-    app.register_blueprint(extract_keyframes_bp)
-    app.register_blueprint(image_to_video_bp)
-    
-    # 📌 Version 1.0 endpoints
-    from routes.v1.ffmpeg.ffmpeg_compose import v1_ffmpeg_compose_bp
-    from routes.v1.media.media_transcribe import v1_media_transcribe_bp
-    from routes.v1.media.transform.media_to_mp3 import v1_media_transform_mp3_bp
-    from routes.v1.video.concatenate import v1_video_concatenate_bp
-    from routes.v1.video.caption_video import v1_video_caption_bp
-    from routes.v1.image.transform.image_to_video import v1_image_transform_video_bp
-    from routes.v1.toolkit.test import v1_toolkit_test_bp  # 🔄 (If needed, change 'toolkit' to 'ciberfobia-api')
-    from routes.v1.toolkit.authenticate import v1_toolkit_auth_bp  # 🔄 (If needed, change 'toolkit' to 'ciberfobia-api')
-    from routes.v1.code.execute.execute_python import v1_code_execute_bp
-
-    app.register_blueprint(v1_ffmpeg_compose_bp)
-    app.register_blueprint(v1_media_transcribe_bp)
-    app.register_blueprint(v1_media_transform_mp3_bp)
-    app.register_blueprint(v1_video_concatenate_bp)
-    app.register_blueprint(v1_video_caption_bp)
-    app.register_blueprint(v1_image_transform_video_bp)
-    app.register_blueprint(v1_toolkit_test_bp)
-    app.register_blueprint(v1_toolkit_auth_bp)
-    app.register_blueprint(v1_code_execute_bp)
+    # ♻️ Replay the jobs of dead workers once every blueprint has registered its task functions
+    replay_orphans()
 
     return app
 
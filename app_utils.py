@@ -1,25 +1,117 @@
 from flask import request, jsonify, current_app
 from functools import wraps
+from werkzeug.exceptions import HTTPException
 import jsonschema
+import hashlib
+import json
+from services.result_cache import get_result_cache
+from services.job_context import current_job, report_progress
+
+# ⚙️ Job control fields accepted by every endpoint on top of its own schema
+JOB_CONTROL_PROPERTIES = {
+    "priority": {"type": "integer", "minimum": 0, "maximum": 10},
+    "deadline": {"type": "number", "minimum": 0},
+    "max_wait": {"type": "number", "minimum": 0},
+    "max_run_time": {"type": "number", "exclusiveMinimum": 0},
+    "max_cpu_time": {"type": "number", "exclusiveMinimum": 0}
+}
+
+def with_job_control_properties(schema):
+    """➕ Extend an endpoint schema with the shared job control fields"""
+    if "properties" not in schema:
+        return schema
+    return {**schema, "properties": {**JOB_CONTROL_PROPERTIES, **schema["properties"]}}
+
+# 🔁 Fields that change between retries of the same job and not its output: left out of its idempotency and result cache keys
+IDEMPOTENCY_IGNORED_FIELDS = ("webhook_url", "id") + tuple(JOB_CONTROL_PROPERTIES)
+
+def idempotency_key(endpoint, data, header_key=None, client=None):
+    """🔑 Key shared by identical jobs of one API key: the Idempotency-Key header if sent, else a canonical hash of the payload"""
+    if header_key:
+        material = {"endpoint": endpoint, "client": client, "idempotency_key": header_key}
+    else:
+        material = {"endpoint": endpoint, "client": client, "data": {k: v for k, v in data.items() if k not in IDEMPOTENCY_IGNORED_FIELDS}}
+    return hashlib.sha256(json.dumps(material, sort_keys=True, separators=(",", ":")).encode()).hexdigest()
+
+def compile_validator(schema):
+    """🧩 Check a schema once and build the validator reused for every payload sent to its route"""
+    validator_class = jsonschema.validators.validator_for(schema)
+    validator_class.check_schema(schema)
+    return validator_class(schema)
+
+def payload_error(view, instance):
+    """📋 The error jsonschema.validate would raise for a payload of a route, or None if it is valid"""
+    validator = getattr(view, 'validator', None)
+    if validator is None:
+        return None
+    return jsonschema.exceptions.best_match(validator.iter_errors(instance))
 
 def validate_payload(schema):
+    schema = with_job_control_properties(schema)
+    validator = compile_validator(schema)  # ⚡ Built at registration instead of on every request
+
     def decorator(f):
         @wraps(f)
         def decorated_function(*args, **kwargs):
             if not request.json:
                 return jsonify({"message": "Missing JSON in request"}), 400
-            try:
-                jsonschema.validate(instance=request.json, schema=schema)
-            except jsonschema.exceptions.ValidationError as validation_error:
+            validation_error = payload_error(decorated_function, request.json)
+            if validation_error is not None:
                 return jsonify({"message": f"Invalid payload: {validation_error.message}"}), 400
             
             return f(*args, **kwargs)
+        decorated_function.schema = schema  # 📋 Lets the batch endpoint validate sub-requests for this route
+        decorated_function.validator = validator
         return decorated_function
     return decorator
 
-def queue_task_wrapper(bypass_queue=False):
+# 📚 Registry of queued task functions, so any worker can run a job by its task key
+TASK_REGISTRY = {}
+
+def task_key(f):
+    """🔑 Stable identifier of a task function across gunicorn workers"""
+    return f"{f.__module__}.{f.__name__}"
+
+def resolve_queued_route(path):
+    """🔍 View function of a queued POST endpoint and its URL arguments, or (None, None)"""
+    try:
+        endpoint, view_args = current_app.url_map.bind('localhost').match(path, method='POST')
+    except HTTPException:
+        return None, None
+    view = current_app.view_functions.get(endpoint)
+    if view is None or not hasattr(view, 'task_key') or view.bypass_queue:
+        return None, None
+    return view, view_args
+
+def queue_task_wrapper(bypass_queue=False, lane='cpu'):
     def decorator(f):
+        TASK_REGISTRY[task_key(f)] = f
+
         def wrapper(*args, **kwargs):
-            return current_app.queue_task(bypass_queue=bypass_queue)(f)(*args, **kwargs)
+            return current_app.queue_task(bypass_queue=bypass_queue, lane=lane)(f)(*args, **kwargs)
+        # 🏷️ Lets the batch endpoint enqueue this task directly
+        wrapper.task_key = task_key(f)
+        wrapper.lane = lane
+        wrapper.bypass_queue = bypass_queue
         return wrapper
-    return decorator
\ No newline at end of file
+    return decorator
+def cache_result(f):
+    """🗃️ Return the previous output of a deterministic task when its inputs and parameters are unchanged"""
+    @wraps(f)
+    def wrapper(job_id, data, *args, **kwargs):
+        job = current_job()
+        # 📁 Pipeline steps read and write files local to their run, so they never hit; a profiled job must really run
+        cache = get_result_cache() if job is None or not (job.pipeline_dir or job.keep_outputs_local or job.profiling) else None
+        key = cache.key_for(task_key(f), data, IDEMPOTENCY_IGNORED_FIELDS) if cache else None
+        if key is not None:
+            cached = cache.get(task_key(f), key)
+            if cached is not None:
+                response, endpoint = cached
+                report_progress(stage='cache', percent=100)
+                return response, endpoint, 200
+
+        response = f(job_id=job_id, data=data, *args, **kwargs)
+        if key is not None and response[2] == 200:
+            cache.put(task_key(f), key, response[0], response[1])
+        return response
+    return wrapper
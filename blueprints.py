@@ -0,0 +1,56 @@
+def register_blueprints(app):
+    """🚀 Register every API blueprint on app; the job pool processes call it too, so task functions can find each other's routes"""
+    # 📥 Import blueprints (API endpoints)
+    from routes.media_to_mp3 import convert_bp
+    from routes.transcribe_media import transcribe_bp
+    from routes.combine_videos import combine_bp
+    from routes.audio_mixing import audio_mixing_bp
+    from routes.gdrive_upload import gdrive_upload_bp
+    from routes.authenticate import auth_bp
+    from routes.caption_video import caption_bp 
+    from routes.extract_keyframes import extract_keyframes_bp
+    from routes.image_to_video import image_to_video_bp
+    
+    # 🚀 Register blueprints
+    app.register_blueprint(convert_bp)
+    app.register_blueprint(transcribe_bp)
+    app.register_blueprint(combine_bp)
+    app.register_blueprint(audio_mixing_bp)
+    app.register_blueprint(gdrive_upload_bp)
+    app.register_blueprint(auth_bp)
+    app.register_blueprint(caption_bp)
+    app.register_blueprint(extract_keyframes_bp)
+    app.register_blueprint(image_to_video_bp)
+    
+    # 📌 Version 1.0 endpoints
+    from routes.v1.ffmpeg.ffmpeg_compose import v1_ffmpeg_compose_bp
+    from routes.v1.media.media_transcribe import v1_media_transcribe_bp
+    from routes.v1.media.transform.media_to_mp3 import v1_media_transform_mp3_bp
+    from routes.v1.video.concatenate import v1_video_concatenate_bp
+    from routes.v1.video.caption_video import v1_video_caption_bp
+    from routes.v1.image.transform.image_to_video import v1_image_transform_video_bp
+    from routes.v1.toolkit.test import v1_toolkit_test_bp  # 🔄 (If needed, change 'toolkit' to 'ciberfobia-api')
+    from routes.v1.toolkit.authenticate import v1_toolkit_auth_bp  # 🔄 (If needed, change 'toolkit' to 'ciberfobia-api')
+    from routes.v1.code.execute.execute_python import v1_code_execute_bp
+    from routes.v1.toolkit.jobs import v1_toolkit_jobs_bp
+    from routes.v1.toolkit.cache import v1_toolkit_cache_bp
+    from routes.v1.toolkit.batch import v1_toolkit_batch_bp
+    from routes.v1.toolkit.pipeline import v1_toolkit_pipeline_bp
+    from routes.v1.toolkit.metrics import v1_toolkit_metrics_bp
+    from routes.v1.toolkit.drain import v1_toolkit_drain_bp
+
+    app.register_blueprint(v1_ffmpeg_compose_bp)
+    app.register_blueprint(v1_media_transcribe_bp)
+    app.register_blueprint(v1_media_transform_mp3_bp)
+    app.register_blueprint(v1_video_concatenate_bp)
+    app.register_blueprint(v1_video_caption_bp)
+    app.register_blueprint(v1_image_transform_video_bp)
+    app.register_blueprint(v1_toolkit_test_bp)
+    app.register_blueprint(v1_toolkit_auth_bp)
+    app.register_blueprint(v1_code_execute_bp)
+    app.register_blueprint(v1_toolkit_jobs_bp)
+    app.register_blueprint(v1_toolkit_cache_bp)
+    app.register_blueprint(v1_toolkit_batch_bp)
+    app.register_blueprint(v1_toolkit_pipeline_bp)
+    app.register_blueprint(v1_toolkit_metrics_bp)
+    app.register_blueprint(v1_toolkit_drain_bp)
@@ -1,9 +1,20 @@
 import os
+import json
+import hashlib
 
 # 🔑 Retrieve the API key from environment variables
 API_KEY = os.environ.get('API_KEY')
-if not API_KEY:
+
+# 👥 Additional API keys, each with its own name and quotas, e.g.
+# {"secret-a": {"name": "team-a", "rate_per_minute": 60, "burst": 20, "max_running": 2, "max_queued": 50}}
+API_KEYS = json.loads(os.environ.get('API_KEYS', '{}'))
+if API_KEY:
+    API_KEYS.setdefault(API_KEY, {"name": "default", "admin": True})  # ♾️ The shared key keeps working, without quotas unless configured
+if not API_KEYS:
     raise ValueError("API_KEY environment variable is not set")
+for _key, _policy in API_KEYS.items():
+    # 🏷️ Jobs are journaled under the key name, never under the secret itself
+    _policy.setdefault("name", "key-" + hashlib.sha256(_key.encode()).hexdigest()[:8])
 
 # ☁️ GCP environment variables
 GCP_SA_CREDENTIALS = os.environ.get('GCP_SA_CREDENTIALS', '')
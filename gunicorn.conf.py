@@ -0,0 +1,47 @@
+import gc
+import os
+import time
+import psutil
+
+# ⚙️ gunicorn reads this file from the working directory on start; the command line in the Dockerfile still sets bind, workers and timeout
+
+# 🧠 Whisper model loaded once in the master before forking, e.g. "base"; empty keeps one copy per job in each worker
+PRELOAD_WHISPER_MODEL = os.environ.get('PRELOAD_WHISPER_MODEL', '')
+
+# 🚪 Seconds an exiting worker waits for its running jobs (same variable app.py reads)
+DRAIN_GRACE_SECONDS = float(os.environ.get('DRAIN_GRACE_SECONDS', 120))
+
+# ⏳ How long the master waits for workers on SIGTERM before killing them: the drain plus a margin to hand queued jobs off
+graceful_timeout = int(DRAIN_GRACE_SECONDS) + 15
+
+MIB = 1024 * 1024
+
+def memory_split():
+    """📊 Resident, shared and private (USS) memory of this process, in MiB"""
+    memory = psutil.Process().memory_full_info()
+    return f"RSS {memory.rss / MIB:.0f} MiB, shared {memory.shared / MIB:.0f} MiB, private {memory.uss / MIB:.0f} MiB, PSS {memory.pss / MIB:.0f} MiB"
+
+def on_starting(server):
+    """🧠 Load the preloaded model in the master, so workers share its weights pages copy-on-write"""
+    if not PRELOAD_WHISPER_MODEL:
+        return
+    from services.whisper_toolkit import preload_model
+    started = time.time()
+    preload_model(PRELOAD_WHISPER_MODEL)
+    # 🧊 Keep the garbage collector from touching (and so copying) the objects loaded so far in every worker
+    gc.collect()
+    gc.freeze()
+    server.log.info(f"Preloaded Whisper model '{PRELOAD_WHISPER_MODEL}' in {time.time() - started:.1f}s; master memory: {memory_split()}")
+
+def post_worker_init(worker):
+    """📊 Report how much of the worker's memory is still shared with the master once the app is loaded"""
+    # 📡 A sync worker serves one request at a time and sends no heartbeat meanwhile, so it must not hold event streams
+    worker.wsgi.streaming = type(worker).__name__ != 'SyncWorker'
+    if PRELOAD_WHISPER_MODEL:
+        worker.log.info(f"Worker {worker.pid} ready; memory: {memory_split()}")
+
+def worker_exit(server, worker):
+    """🚪 Drain the worker before it exits: queued jobs go to the other workers, running ones get DRAIN_GRACE_SECONDS to finish"""
+    drain = getattr(getattr(worker, 'wsgi', None), 'drain', None)
+    if drain is not None:
+        drain(DRAIN_GRACE_SECONDS, heartbeat=worker.notify)
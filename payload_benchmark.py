@@ -0,0 +1,110 @@
+import os
+import re
+import json
+import timeit
+import argparse
+import jsonschema
+from flask import Flask
+
+os.environ.setdefault('API_KEY', 'payload-benchmark')  # 🔑 config refuses to load without one; no request is ever authenticated
+
+from blueprints import register_blueprints
+from app_utils import payload_error
+from services import fast_json
+
+# 🧪 Strings tried in order for schema fields with a pattern
+PATTERN_SAMPLES = ("128k", "step_1", "value")
+
+def sample_value(schema, items):
+    """🧪 A value matching schema, with arrays holding `items` entries so large payloads can be measured"""
+    branches = schema.get("oneOf") or schema.get("anyOf") or []
+    if branches and "type" not in schema:
+        return sample_value(branches[0], items)
+    if "enum" in schema:
+        return schema["enum"][0]
+    kind = schema.get("type", "object")
+    if isinstance(kind, list):
+        kind = kind[0]
+    if kind == "object":
+        properties = schema.get("properties", {})
+        # 🔀 Fields only the other oneOf/anyOf branches require are left out, so the first branch matches alone
+        excluded = {name for branch in branches[1:] for name in branch.get("required", [])}
+        names = [name for name in {**properties, **dict.fromkeys(schema.get("required", []))} if name not in excluded]
+        return {name: sample_value(properties.get(name, {}), items) for name in names}
+    if kind == "array":
+        count = min(max(items, schema.get("minItems", 0)), schema.get("maxItems", items))
+        return [sample_value(schema.get("items", {}), items) for _ in range(count)]
+    if kind in ("number", "integer"):
+        return max(schema.get("minimum", 1), 1)
+    if kind == "boolean":
+        return True
+    if schema.get("format") == "uri":
+        return "https://example.com/media/sample.mp4"
+    if "pattern" in schema:
+        return next((text for text in PATTERN_SAMPLES if re.search(schema["pattern"], text)), PATTERN_SAMPLES[-1])
+    return "sample"
+
+def transcription_response(segments):
+    """📝 Webhook payload of a transcription job returning `segments` timed segments"""
+    return {
+        "endpoint": "/v1/media/transcribe",
+        "code": 200,
+        "id": "benchmark",
+        "job_id": "00000000-0000-0000-0000-000000000000",
+        "response": {
+            "text": " ".join("Texto de ejemplo con acentuación" for _ in range(segments)),
+            "segments": [
+                {"id": i, "start": i * 2.5, "end": i * 2.5 + 2.4, "text": "Texto de ejemplo con acentuación",
+                 "words": [{"word": word, "start": i * 2.5 + j * 0.5, "end": i * 2.5 + j * 0.5 + 0.4, "probability": 0.98}
+                           for j, word in enumerate("Texto de ejemplo con acentuación".split())]}
+                for i in range(segments)
+            ]
+        },
+        "message": "success",
+        "run_time": 12.345,
+        "queue_time": 0.012,
+        "total_time": 12.357
+    }
+
+def best_time(func, number):
+    """⏱️ Fastest of three runs, in microseconds per call"""
+    return min(timeit.repeat(func, number=number, repeat=3)) / number * 1e6
+
+def main():
+    """🚀 Compare per-request validation and serialization costs: jsonschema.validate against the precompiled validators, json against fast_json"""
+    parser = argparse.ArgumentParser(description="Measure payload validation and JSON serialization time of every endpoint.")
+    parser.add_argument('--items', type=int, default=50, help="entries in every array of the sample payloads (default: 50)")
+    parser.add_argument('--segments', type=int, default=500, help="segments in the sample transcription response (default: 500)")
+    parser.add_argument('--number', type=int, default=200, help="calls per timing run (default: 200)")
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    register_blueprints(app)
+    routes = {rule.rule: app.view_functions[rule.endpoint] for rule in app.url_map.iter_rules()
+              if hasattr(app.view_functions[rule.endpoint], 'validator')}
+
+    print(f"⚡ Fast JSON: {'orjson' if fast_json.enabled else 'disabled (orjson not installed or FAST_JSON=false)'}")
+    print(f"\n📋 Validation and serialization of a sample payload, µs per request ({args.items} items per array)")
+    print(f"  {'endpoint':<40} {'bytes':>8} {'validate':>10} {'compiled':>10} {'json':>9} {'fast':>9}")
+    for path, view in sorted(routes.items()):
+        payload = sample_value(view.schema, args.items)
+        error = payload_error(view, payload)
+        if error is not None:
+            print(f"  {path:<40} ⚠️ skipped, no sample payload: {error.message}")
+            continue
+        size = len(json.dumps(payload))
+        validate = best_time(lambda: jsonschema.validate(instance=payload, schema=view.schema), args.number)
+        compiled = best_time(lambda: payload_error(view, payload), args.number)
+        stdlib = best_time(lambda: json.loads(json.dumps(payload)), args.number)
+        fast = best_time(lambda: fast_json.loads(fast_json.dumps(payload)), args.number)
+        print(f"  {path:<40} {size:>8} {validate:>10.1f} {compiled:>10.1f} {stdlib:>9.1f} {fast:>9.1f}")
+
+    response = transcription_response(args.segments)
+    size = len(json.dumps(response))
+    stdlib = best_time(lambda: json.dumps(response), args.number)
+    fast = best_time(lambda: fast_json.dumps(response), args.number)
+    print(f"\n📝 Transcription webhook with {args.segments} segments ({size} bytes), µs per encode")
+    print(f"  json: {stdlib:.1f}  fast: {fast:.1f}")
+
+if __name__ == '__main__':
+    main()
@@ -1,14 +1,12 @@
 from flask import Blueprint, request, jsonify, current_app
 from app_utils import *
 from functools import wraps
+from services.quotas import lookup_api_key
 import os
 
 # 📌 Crear un Blueprint para el endpoint de autenticación
 auth_bp = Blueprint('auth', __name__)
 
-# 🔑 Obtener la API key predefinida del entorno
-API_KEY = os.environ.get('API_KEY')
-
 # 🚀 Endpoint de autenticación
 # Ejecuta la verificación de la API key proporcionada en los encabezados de la solicitud
 @auth_bp.route('/authenticate', methods=['GET'])
@@ -17,8 +15,8 @@ def authenticate_endpoint(**kwargs):
     # 📥 Obtener la API key del encabezado 'X-API-Key'
     api_key = request.headers.get('X-API-Key')
     
-    # ✅ Comparar la API key recibida con la API key predefinida
-    if api_key == API_KEY:
+    # ✅ Comprobar que la API key recibida es una de las configuradas
+    if lookup_api_key(api_key) is not None:
         return "Authorized", "/authenticate", 200  # Autorizado
     else:
         return "Unauthorized", "/authenticate", 401  # No autorizado
@@ -5,12 +5,13 @@ import threading
 import requests
 import uuid
 import json
-from google.oauth2.service_account import Credentials
-from google.auth.transport.requests import Request
 from datetime import datetime
 import time
 import psutil
 from services.authentication import authenticate
+from services.job_context import report_progress, span
+from services.metrics import record_transfer
+from services.file_management import TRANSFER_TIMEOUT
 from app_utils import validate_payload, queue_task_wrapper
 
 # 🔧 Configuración básica del logging
@@ -43,6 +44,10 @@ def get_access_token():
     """
     🔑 Obtiene un token de acceso para las APIs de Google usando credenciales de cuenta de servicio.
     """
+    # 📦 Importadas aquí para que los workers que nunca suben a Drive no carguen las librerías de Google
+    from google.oauth2.service_account import Credentials
+    from google.auth.transport.requests import Request
+
     credentials_info = json.loads(GCP_SA_CREDENTIALS)
     credentials = Credentials.from_service_account_info(
         credentials_info,
@@ -68,11 +73,12 @@ def initiate_resumable_upload(filename, folder_id, mime_type='application/octet-
         'name': filename,
         'parents': [folder_id]
     }
-    response = requests.post(url, headers=headers, data=json.dumps(metadata))
+    response = requests.post(url, headers=headers, data=json.dumps(metadata), timeout=TRANSFER_TIMEOUT)
     response.raise_for_status()
     upload_url = response.headers['Location']
     return upload_url
 
+@span('upload')
 def upload_file_in_chunks(file_url, upload_url, total_size, job_id, chunk_size):
     """
     📤 Sube el archivo a Google Drive en fragmentos, transmitiendo los datos directamente desde la URL de origen.
@@ -88,7 +94,7 @@ def upload_file_in_chunks(file_url, upload_url, total_size, job_id, chunk_size):
         active_uploads.append(progress)
 
     try:
-        with requests.get(file_url, stream=True) as r:
+        with requests.get(file_url, stream=True, timeout=TRANSFER_TIMEOUT) as r:
             r.raise_for_status()
             iterator = r.iter_content(chunk_size=chunk_size)
             for chunk in iterator:
@@ -105,19 +111,22 @@ def upload_file_in_chunks(file_url, upload_url, total_size, job_id, chunk_size):
                             upload_response = requests.put(
                                 upload_url,
                                 headers=headers,
-                                data=chunk
+                                data=chunk,
+                                timeout=TRANSFER_TIMEOUT
                             )
                             if upload_response.status_code in (200, 201):
                                 # ✅ Subida completada
                                 logger.info(f"Job {job_id}: Subida completada.")
                                 with progress.lock:
                                     progress.bytes_uploaded = end + 1
+                                record_transfer('upload', end + 1, time.time() - progress.start_time)  # 📈 Para /metrics
                                 return upload_response.json()['id']
                             elif upload_response.status_code == 308:
                                 # ⏳ Subida incompleta, continuar con el siguiente fragmento
                                 bytes_uploaded = end + 1
                                 with progress.lock:
                                     progress.bytes_uploaded = bytes_uploaded
+                                report_progress(stage='upload', percent=bytes_uploaded / total_size * 100, bytes=bytes_uploaded)
                                 break  # Salir del bucle de reintentos y continuar con el siguiente fragmento
                             else:
                                 logger.error(f"Job {job_id}: Código inesperado: {upload_response.status_code}")
@@ -155,7 +164,7 @@ def upload_file_in_chunks(file_url, upload_url, total_size, job_id, chunk_size):
     "required": ["file_url", "filename", "folder_id"],
     "additionalProperties": False
 })
-@queue_task_wrapper(bypass_queue=False)
+@queue_task_wrapper(bypass_queue=False, lane='io')
 def gdrive_upload(job_id, data):
     logger.info(f"Processing Job ID: {job_id}")
 
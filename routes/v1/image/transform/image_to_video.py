@@ -24,6 +24,7 @@ logger = logging.getLogger(__name__)
     "additionalProperties": False
 })
 @queue_task_wrapper(bypass_queue=False)
+@cache_result
 def image_to_video(job_id, data):
     image_url = data.get('image_url')
     length = data.get('length', 5)
@@ -28,7 +28,7 @@ logger = logging.getLogger(__name__)
     "required": ["media_url"],
     "additionalProperties": False
 })
-@queue_task_wrapper(bypass_queue=False)
+@queue_task_wrapper(bypass_queue=False, lane='heavy')
 def transcribe(job_id, data):
     media_url = data['media_url']
     task = data.get('task', 'transcribe')
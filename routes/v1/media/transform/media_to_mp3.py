@@ -24,6 +24,7 @@ logger = logging.getLogger(__name__)
     "additionalProperties": False
 })
 @queue_task_wrapper(bypass_queue=False)
+@cache_result
 def convert_media_to_mp3(job_id, data):
     media_url = data['media_url']
     webhook_url = data.get('webhook_url')
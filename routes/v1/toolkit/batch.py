@@ -0,0 +1,78 @@
+import os
+import logging
+from flask import Blueprint, request, jsonify, current_app, g
+from services.authentication import authenticate, client_scope
+from app_utils import validate_payload, payload_error, resolve_queued_route
+from version import BUILD_NUMBER
+
+v1_toolkit_batch_bp = Blueprint('v1_toolkit_batch', __name__)
+logger = logging.getLogger(__name__)
+
+BATCH_MAX_ITEMS = int(os.environ.get('BATCH_MAX_ITEMS', 1000))  # 📦 Largest number of sub-requests in one batch
+BATCH_DEFAULT_FIELDS = ("priority", "deadline")  # ⚙️ Batch-level fields applied to sub-requests that do not set them
+
+@v1_toolkit_batch_bp.route('/v1/toolkit/batch', methods=['POST'])
+@authenticate
+@validate_payload({
+    "type": "object",
+    "properties": {
+        "requests": {
+            "type": "array",
+            "minItems": 1,
+            "maxItems": BATCH_MAX_ITEMS,
+            "items": {
+                "type": "object",
+                "properties": {
+                    "endpoint": {"type": "string"},
+                    "payload": {"type": "object"}
+                },
+                "required": ["endpoint", "payload"],
+                "additionalProperties": False
+            }
+        },
+        "webhook_url": {"type": "string", "format": "uri"},
+        "id": {"type": "string"}
+    },
+    "required": ["requests"],
+    "additionalProperties": False
+})
+def submit_batch():
+    data = request.json
+    defaults = {field: data[field] for field in BATCH_DEFAULT_FIELDS if field in data}
+
+    # 📋 Validate every sub-request before enqueuing any of them
+    items, errors = [], []
+    for index, sub_request in enumerate(data["requests"]):
+        path = sub_request["endpoint"]
+        view, view_args = resolve_queued_route(path)
+        if view is None:
+            errors.append({"index": index, "endpoint": path, "message": "Unknown or non-queued endpoint"})
+            continue
+        payload = {**defaults, **sub_request["payload"]}
+        validation_error = payload_error(view, payload)
+        if validation_error is not None:
+            errors.append({"index": index, "endpoint": path, "message": f"Invalid payload: {validation_error.message}"})
+            continue
+        check = getattr(view, 'payload_errors', None)  # 🔀 Checks a schema cannot express, such as the DAG of a pipeline
+        content_errors = check(payload) if check is not None else []
+        if content_errors:
+            errors.extend({"index": index, "endpoint": path, **error} for error in content_errors)
+            continue
+        items.append({"endpoint": path, "task_key": view.task_key, "lane": view.lane, "data": payload, "kwargs": view_args})
+
+    if errors:
+        return jsonify({"code": 400, "id": data.get("id"), "message": "Invalid batch", "errors": errors, "build_number": BUILD_NUMBER}), 400
+
+    logger.info(f"Batch with {len(items)} jobs received")
+    return current_app.submit_batch(items, data.get("webhook_url"), data.get("id"), client=g.get("api_key"))
+
+@v1_toolkit_batch_bp.route('/v1/toolkit/batch/<batch_id>', methods=['GET'])
+@authenticate
+def get_batch_status(batch_id):
+    batch = current_app.job_store.get_batch(batch_id, client_scope())  # 👥 Batches of other API keys look unknown
+    if batch is None:
+        return jsonify({"code": 404, "batch_id": batch_id, "message": "Batch not found"}), 404
+
+    batch.pop("webhook_url")
+    batch["build_number"] = BUILD_NUMBER
+    return jsonify(batch), 200
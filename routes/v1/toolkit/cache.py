@@ -0,0 +1,17 @@
+import logging
+from flask import Blueprint, jsonify
+from services.authentication import authenticate
+from services.result_cache import get_result_cache
+from version import BUILD_NUMBER
+
+v1_toolkit_cache_bp = Blueprint('v1_toolkit_cache', __name__)
+logger = logging.getLogger(__name__)
+
+@v1_toolkit_cache_bp.route('/v1/toolkit/cache', methods=['GET'])
+@authenticate
+def get_cache_stats():
+    cache = get_result_cache()
+    if cache is None:
+        return jsonify({"code": 200, "enabled": False, "build_number": BUILD_NUMBER}), 200
+
+    return jsonify({"code": 200, "enabled": True, **cache.stats(), "build_number": BUILD_NUMBER}), 200
@@ -0,0 +1,41 @@
+import os
+import logging
+from flask import Blueprint, jsonify, current_app, request, g
+from services.authentication import authenticate
+from version import BUILD_NUMBER
+
+v1_toolkit_drain_bp = Blueprint('v1_toolkit_drain', __name__)
+logger = logging.getLogger(__name__)
+
+def drain_status(code, message):
+    requested_at = current_app.job_store.drain_requested_at()
+    return jsonify({
+        "code": code,
+        "message": message,
+        "drain_requested_at": requested_at,
+        "pid": os.getpid(),
+        "draining": current_app.draining.is_set(),
+        "build_number": BUILD_NUMBER
+    }), code
+
+@v1_toolkit_drain_bp.route('/v1/toolkit/drain', methods=['GET'])
+@authenticate
+def get_drain():
+    return drain_status(200, "draining" if current_app.draining.is_set() else "serving")
+
+@v1_toolkit_drain_bp.route('/v1/toolkit/drain', methods=['POST', 'DELETE'])
+@authenticate
+def change_drain():
+    # 🔒 Draining stops the whole instance from taking queued jobs, so only admin keys may do it
+    if not g.api_key.get("admin"):
+        return jsonify({"code": 403, "message": "Draining requires an admin API key", "build_number": BUILD_NUMBER}), 403
+
+    if request.method == 'POST':
+        current_app.job_store.request_drain()
+        logger.info(f"Drain requested by API key '{g.api_key['name']}'")
+        return drain_status(202, "Running workers are draining; workers started from now on keep serving")
+
+    if not current_app.job_store.cancel_drain():
+        return drain_status(409, "No drain was requested")
+    logger.info(f"Drain withdrawn by API key '{g.api_key['name']}'")
+    return drain_status(200, "Drain withdrawn; workers take queued jobs again")
@@ -0,0 +1,56 @@
+import logging
+from flask import Blueprint, Response, jsonify, current_app, request, stream_with_context
+from services.authentication import authenticate, client_scope
+from services.job_store import QUEUED, RUNNING, CANCELLED, FINISHED_STATES
+from services.job_events import job_event_stream
+from version import BUILD_NUMBER
+
+v1_toolkit_jobs_bp = Blueprint('v1_toolkit_jobs', __name__)
+logger = logging.getLogger(__name__)
+
+@v1_toolkit_jobs_bp.route('/v1/toolkit/jobs/<job_id>', methods=['GET'])
+@authenticate
+def get_job_status(job_id):
+    job = current_app.job_store.get(job_id, client_scope())  # 👥 Jobs of other API keys look unknown
+    if job is None:
+        return jsonify({"code": 404, "job_id": job_id, "message": "Job not found"}), 404
+
+    job["build_number"] = BUILD_NUMBER
+    return jsonify(job), 200
+
+@v1_toolkit_jobs_bp.route('/v1/toolkit/jobs/<job_id>/events', methods=['GET'])
+@authenticate(allow_query_key=True)
+def stream_job_events(job_id):
+    if not getattr(current_app, 'streaming', True):
+        return jsonify({"code": 503, "job_id": job_id, "message": "Live events need threaded gunicorn workers (GUNICORN_THREADS > 1); poll /v1/toolkit/jobs/<job_id> instead", "build_number": BUILD_NUMBER}), 503
+    job_store = current_app.job_store
+    job = job_store.get(job_id, client_scope())
+    if job is None:
+        return jsonify({"code": 404, "job_id": job_id, "message": "Job not found"}), 404
+
+    # 🔁 A reconnecting EventSource resumes after the last state change it received
+    try:
+        last_event_id = int(request.headers.get('Last-Event-ID', 0))
+    except ValueError:
+        last_event_id = 0
+    if last_event_id and job["state"] in FINISHED_STATES and not job_store.events_since(job_id, last_event_id):
+        return "", 204  # 🏁 It already saw the job finish; 204 tells EventSource to stop reconnecting
+    return Response(
+        stream_with_context(job_event_stream(job_store, job_id, last_event_id)),
+        mimetype='text/event-stream',
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}  # 📡 Keep proxies from buffering the stream
+    )
+
+@v1_toolkit_jobs_bp.route('/v1/toolkit/jobs/<job_id>', methods=['DELETE'])
+@authenticate
+def cancel_job(job_id):
+    state = current_app.cancel_job(job_id, client_scope())
+    if state is None:
+        return jsonify({"code": 404, "job_id": job_id, "message": "Job not found"}), 404
+    if state == QUEUED:
+        return jsonify({"code": 200, "job_id": job_id, "state": CANCELLED, "message": "Job cancelled before it started", "build_number": BUILD_NUMBER}), 200
+    if state == RUNNING:
+        return jsonify({"code": 202, "job_id": job_id, "state": "cancelling", "message": "Job is being stopped", "build_number": BUILD_NUMBER}), 202
+
+    logger.info(f"Job {job_id}: Cancellation requested but the job already finished as {state}")
+    return jsonify({"code": 409, "job_id": job_id, "state": state, "message": f"Job already {state}", "build_number": BUILD_NUMBER}), 409
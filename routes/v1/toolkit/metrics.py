@@ -0,0 +1,29 @@
+import os
+import logging
+from flask import Blueprint, Response, current_app
+from services.authentication import authenticate
+from services.metrics import get_metrics, host_gauges
+
+v1_toolkit_metrics_bp = Blueprint('v1_toolkit_metrics', __name__)
+logger = logging.getLogger(__name__)
+
+# 🔓 Let Prometheus scrape without an X-API-Key header, e.g. when /metrics is only reachable from the internal network
+METRICS_PUBLIC = os.environ.get('METRICS_PUBLIC', 'false').lower() in ('1', 'true', 'yes')
+
+def queue_gauges():
+    """📏 Queued and running jobs per worker and lane, from the job journal shared by every worker"""
+    values = [
+        ({"worker": owner.split(':', 1)[0], "lane": lane, "state": state}, count)
+        for owner, lane, state, count in current_app.job_store.queue_depth()
+    ]
+    return [("queue_jobs", "Unfinished jobs per gunicorn worker, lane and state", values)]
+
+def get_metrics_text():
+    body = get_metrics().render(queue_gauges() + host_gauges())
+    return Response(body, content_type='text/plain; version=0.0.4; charset=utf-8')
+
+@v1_toolkit_metrics_bp.route('/metrics', methods=['GET'])
+def metrics():
+    if METRICS_PUBLIC:
+        return get_metrics_text()
+    return authenticate(get_metrics_text)()
@@ -0,0 +1,98 @@
+import logging
+from functools import wraps
+from flask import Blueprint, request, jsonify
+from services.authentication import authenticate
+from services.pipeline import plan_pipeline, validation_payload, run_pipeline, PipelineError, PipelineStepFailed
+from app_utils import validate_payload, payload_error, queue_task_wrapper, resolve_queued_route, TASK_REGISTRY
+from version import BUILD_NUMBER
+
+v1_toolkit_pipeline_bp = Blueprint('v1_toolkit_pipeline', __name__)
+logger = logging.getLogger(__name__)
+
+MAX_PIPELINE_STEPS = 20
+
+def queued_step_view(step):
+    """🔍 View function and URL arguments of the endpoint of a step, or (None, None) when it is unknown, not queued or a pipeline"""
+    view, view_args = resolve_queued_route(step["endpoint"])
+    if view is None or view.task_key == run_pipeline_task.task_key:  # 🚫 No nested pipelines
+        return None, None
+    return view, view_args
+
+def pipeline_errors(data):
+    """📋 Problems with the DAG and the step payloads of a pipeline request, as a list of error objects"""
+    steps = data["steps"]
+    errors = []
+    try:
+        plan_pipeline(steps)
+    except PipelineError as e:
+        errors.append({"message": str(e)})
+    for step in steps:
+        view, _ = queued_step_view(step)
+        if view is None:
+            errors.append({"step": step["id"], "message": f"Unknown or non-queued endpoint {step['endpoint']}"})
+            continue
+        validation_error = payload_error(view, validation_payload(step))
+        if validation_error is not None:
+            errors.append({"step": step["id"], "message": f"Invalid payload: {validation_error.message}"})
+    return errors
+
+def validate_steps(f):
+    """📋 Check the DAG and every step payload before the pipeline is queued"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        errors = pipeline_errors(request.json)
+        if errors:
+            return jsonify({"code": 400, "id": request.json.get("id"), "message": "Invalid pipeline", "errors": errors, "build_number": BUILD_NUMBER}), 400
+        return f(*args, **kwargs)
+    decorated_function.payload_errors = pipeline_errors  # 📋 Lets the batch endpoint run the same checks on pipeline sub-requests
+    return decorated_function
+
+def run_step(step_job_id, step, payload):
+    """🔄 Run one step with the task function of its endpoint"""
+    view, view_args = queued_step_view(step)
+    if view is None:
+        return {"error": f"Unknown or non-queued endpoint {step['endpoint']}"}, step["endpoint"], 400
+    return TASK_REGISTRY[view.task_key](job_id=step_job_id, data=payload, **view_args)
+
+@v1_toolkit_pipeline_bp.route('/v1/toolkit/pipeline', methods=['POST'])
+@authenticate
+@validate_payload({
+    "type": "object",
+    "properties": {
+        "steps": {
+            "type": "array",
+            "minItems": 1,
+            "maxItems": MAX_PIPELINE_STEPS,
+            "items": {
+                "type": "object",
+                "properties": {
+                    "id": {"type": "string", "pattern": "^[A-Za-z0-9_-]+$"},
+                    "endpoint": {"type": "string"},
+                    "payload": {"type": "object"}
+                },
+                "required": ["id", "endpoint", "payload"],
+                "additionalProperties": False
+            }
+        },
+        "webhook_url": {"type": "string", "format": "uri"},
+        "id": {"type": "string"}
+    },
+    "required": ["steps"],
+    "additionalProperties": False
+})
+@validate_steps
+@queue_task_wrapper(bypass_queue=False, lane='heavy')
+def run_pipeline_task(job_id, data):
+    logger.info(f"Job {job_id}: Received pipeline with {len(data['steps'])} steps")
+
+    try:
+        outputs = run_pipeline(job_id, data["steps"], run_step)
+        logger.info(f"Job {job_id}: Pipeline completed successfully")
+        return outputs, "/v1/toolkit/pipeline", 200
+
+    except PipelineStepFailed as e:
+        logger.error(f"Job {job_id}: {e}")
+        return {"step": e.step_id, "error": e.response}, "/v1/toolkit/pipeline", e.code
+    except Exception as e:
+        logger.error(f"Job {job_id}: Error during pipeline - {str(e)}")
+        return {"error": str(e)}, "/v1/toolkit/pipeline", 500
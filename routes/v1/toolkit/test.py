@@ -12,13 +12,13 @@ STORAGE_PATH = "/tmp/"
 
 @v1_toolkit_test_bp.route('/v1/toolkit/test', methods=['GET'])
 @authenticate
-@queue_task_wrapper(bypass_queue=False)
+@queue_task_wrapper(bypass_queue=False, lane='io')
 def test_api(job_id, data):
     logger.info(f"Job {job_id}: Testing NCA Toolkit API setup")
     
     try:
         # Create test file
-        test_filename = os.path.join(STORAGE_PATH, "success.txt")
+        test_filename = os.path.join(STORAGE_PATH, f"{job_id}_success.txt")
         with open(test_filename, 'w') as f:
             f.write("You have successfully installed the Ciberfobia API, great job!")
         
@@ -1,5 +1,5 @@
 from flask import Blueprint, jsonify
-from app_utils import validate_payload, queue_task_wrapper
+from app_utils import validate_payload, queue_task_wrapper, cache_result
 import logging
 from services.v1.video.caption_video import process_captioning_v1
 from services.authentication import authenticate
@@ -74,7 +74,8 @@ logger = logging.getLogger(__name__)
     "required": ["video_url"],
     "additionalProperties": False
 })
-@queue_task_wrapper(bypass_queue=False)
+@queue_task_wrapper(bypass_queue=False, lane='heavy')
+@cache_result
 def caption_video_v1(job_id, data):
     video_url = data['video_url']
     captions = data.get('captions')
@@ -0,0 +1,75 @@
+import os
+import json
+import logging
+import psutil
+import requests
+from concurrent.futures import ThreadPoolExecutor, wait
+from services.file_management import find_input_urls
+
+logger = logging.getLogger(__name__)
+
+STORAGE_PATH = "/tmp/"
+
+# 🚦 Headroom that must remain after admitting a job
+MIN_FREE_DISK_MB = float(os.environ.get('MIN_FREE_DISK_MB', 1024))  # 💾 Free space in /tmp, after every admitted job is counted
+MIN_FREE_MEMORY_MB = float(os.environ.get('MIN_FREE_MEMORY_MB', 512))  # 🧠 Available memory
+MAX_LOAD_PER_CPU = float(os.environ.get('MAX_LOAD_PER_CPU', 0))  # 📈 1-minute load average per core, 0 disables the check
+DISK_USAGE_FACTOR = float(os.environ.get('DISK_USAGE_FACTOR', 3))  # ✖️ Disk used by a job relative to the size of its inputs
+# 🛣️ Maximum unfinished jobs per endpoint, e.g. {"/v1/video/caption": 5}
+ENDPOINT_QUEUE_LIMITS = json.loads(os.environ.get('ENDPOINT_QUEUE_LIMITS', '{}'))
+
+RESOURCE_RETRY_AFTER = 30  # ⏱️ Seconds clients are asked to wait when the host is short of resources
+HEAD_TIMEOUT = 5  # ⏱️ Seconds to wait for the HEAD request that sizes an input
+HEAD_CONCURRENCY = 8  # 🧵 Inputs sized at the same time
+SIZING_BUDGET = 5  # ⏱️ Seconds the request thread waits for all the HEAD requests of a job; inputs not sized by then count as 0
+
+class AdmissionDenied(Exception):
+    """🚫 A request cannot be accepted right now"""
+
+    def __init__(self, code, message, retry_after):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+        self.retry_after = retry_after
+
+def content_length(url):
+    """📏 Size in bytes announced by a HEAD request, or 0 when the server does not say"""
+    try:
+        response = requests.head(url, allow_redirects=True, timeout=HEAD_TIMEOUT)
+        return int(response.headers.get('Content-Length', 0) or 0)
+    except (requests.RequestException, ValueError):
+        return 0
+
+def estimate_disk_bytes(data):
+    """💾 Disk a job will use in /tmp: its inputs, intermediates and outputs"""
+    urls = find_input_urls(data)
+    if not urls:
+        return 0
+    pool = ThreadPoolExecutor(max_workers=min(len(urls), HEAD_CONCURRENCY))
+    futures = [pool.submit(content_length, url) for url in urls]
+    done, not_done = wait(futures, timeout=SIZING_BUDGET)
+    pool.shutdown(wait=False, cancel_futures=True)  # 🚪 Slow servers do not hold up admission past the budget
+    if not_done:
+        logger.info(f"Sized {len(done)} of {len(urls)} inputs within {SIZING_BUDGET}s; the rest count as 0 bytes")
+    return int(sum(future.result() for future in done) * DISK_USAGE_FACTOR)
+
+def check_resources(disk_bytes, reserved_disk_bytes=0):
+    """🔍 Raise AdmissionDenied (503) if disk, memory or load leave no room for a job needing disk_bytes"""
+    free_disk = psutil.disk_usage(STORAGE_PATH).free
+    if free_disk - reserved_disk_bytes - disk_bytes < MIN_FREE_DISK_MB * 1024 * 1024:
+        raise AdmissionDenied(503, f"Not enough free disk: {free_disk // 2**20} MB free, {reserved_disk_bytes // 2**20} MB reserved by admitted jobs, {disk_bytes // 2**20} MB needed", RESOURCE_RETRY_AFTER)
+
+    available_memory = psutil.virtual_memory().available
+    if available_memory < MIN_FREE_MEMORY_MB * 1024 * 1024:
+        raise AdmissionDenied(503, f"Not enough free memory: {available_memory // 2**20} MB available", RESOURCE_RETRY_AFTER)
+
+    if MAX_LOAD_PER_CPU > 0:
+        load = os.getloadavg()[0] / (psutil.cpu_count() or 1)
+        if load > MAX_LOAD_PER_CPU:
+            raise AdmissionDenied(503, f"Host overloaded: load average {load:.2f} per CPU", RESOURCE_RETRY_AFTER)
+
+def check_endpoint_limit(endpoint, unfinished_jobs, retry_after):
+    """🔍 Raise AdmissionDenied (429) if the endpoint already has its maximum of unfinished jobs"""
+    limit = ENDPOINT_QUEUE_LIMITS.get(endpoint)
+    if limit is not None and unfinished_jobs >= limit:
+        raise AdmissionDenied(429, f"Queue limit for {endpoint} ({limit}) reached", retry_after)
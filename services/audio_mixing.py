@@ -1,12 +1,12 @@
 import os
-import subprocess
 from services.file_management import download_file
+from services.ffmpeg_toolkit import run_ffmpeg, run_process
 
 STORAGE_PATH = "/tmp/"
 
 def get_duration(file_path):
     cmd = ['ffprobe', '-v', 'error', '-show_entries', 'format=duration', '-of', 'default=noprint_wrappers=1:nokey=1', file_path]
-    result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    result = run_process(cmd)
     return float(result.stdout)
 
 def process_audio_mixing(video_url, audio_url, video_vol, audio_vol, output_length, job_id, webhook_url=None):
@@ -57,7 +57,7 @@ def process_audio_mixing(video_url, audio_url, video_vol, audio_vol, output_leng
     cmd.append(output_path)
 
     # Run FFmpeg command
-    subprocess.run(cmd, check=True)
+    run_ffmpeg(cmd, duration=output_duration)
 
     # Clean up input files
     os.remove(video_path)
@@ -1,13 +1,24 @@
 from functools import wraps
-from flask import request, jsonify
-from config import API_KEY
+from flask import request, jsonify, g
+from services.quotas import lookup_api_key
+
+def authenticate(func=None, allow_query_key=False):
+    """🔑 Require a known X-API-Key; allow_query_key also accepts ?api_key=, for clients such as EventSource that cannot set headers"""
+    if func is None:
+        return lambda f: authenticate(f, allow_query_key)
 
-def authenticate(func):
     @wraps(func)
     def wrapper(*args, **kwargs):
         api_key = request.headers.get('X-API-Key')
-        
-        if api_key != API_KEY:
+        if api_key is None and allow_query_key:
+            api_key = request.args.get('api_key')
+        policy = lookup_api_key(api_key)
+        if policy is None:
             return jsonify({"message": "Unauthorized"}), 401
+        g.api_key = policy  # 👥 Used by queue_task to apply the quotas of this key
         return func(*args, **kwargs)
     return wrapper
+
+def client_scope():
+    """👥 Name of the API key whose jobs and batches the request may see, or None for admin keys, which see them all"""
+    return None if g.api_key.get("admin") else g.api_key["name"]
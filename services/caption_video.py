@@ -3,7 +3,8 @@ import ffmpeg
 import logging
 import requests
 import subprocess
-from services.file_management import download_file
+from services.file_management import download_file, TRANSFER_TIMEOUT
+from services.ffmpeg_toolkit import run_ffmpeg
 
 # Set the default local storage directory
 STORAGE_PATH = "/tmp/"
@@ -56,8 +57,6 @@ def match_fonts():
     except Exception as e:
         logger.error(f"Exception while matching fonts: {str(e)}")
 
-match_fonts()
-
 def generate_style_line(options):
     """Generate ASS style line from options."""
     style_options = {
@@ -115,7 +114,7 @@ Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
         if caption_srt.startswith("https"):
             # Download the file if caption_srt is a URL
             logger.info(f"Job {job_id}: Downloading caption file from {caption_srt}")
-            response = requests.get(caption_srt)
+            response = requests.get(caption_srt, timeout=TRANSFER_TIMEOUT)
             response.raise_for_status()  # Raise an exception for bad status codes
             if caption_type in ['srt','vtt']:
                 with open(srt_path, 'wb') as srt_file:
@@ -187,16 +186,16 @@ Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
             logger.info(f"Job {job_id}: Running FFmpeg with filter: {subtitle_filter}")
 
             # Run FFmpeg to add subtitles to the video
-            ffmpeg.input(video_path).output(
+            run_ffmpeg(ffmpeg.input(video_path).output(
                 output_path,
                 vf=subtitle_filter,
                 acodec='copy'
-            ).run()
+            ).compile())
             logger.info(f"Job {job_id}: FFmpeg processing completed, output file at {output_path}")
-        except ffmpeg.Error as e:
+        except subprocess.CalledProcessError as e:
             # Log the FFmpeg stderr output
             if e.stderr:
-                error_message = e.stderr.decode('utf8')
+                error_message = e.stderr
             else:
                 error_message = 'Unknown FFmpeg error'
             logger.error(f"Job {job_id}: FFmpeg error: {error_message}")
@@ -1,9 +1,13 @@
 import os
+import time
 import logging
 from abc import ABC, abstractmethod
 from services.gcp_toolkit import upload_to_gcs
 from services.s3_toolkit import upload_to_s3
 from config import validate_env_vars
+from services.job_context import current_job, report_progress, span
+from services.file_management import keep_pipeline_file
+from services.metrics import record_transfer
 
 logger = logging.getLogger(__name__)
 
@@ -36,11 +40,23 @@ def get_storage_provider() -> CloudStorageProvider:
         validate_env_vars('S3')
         return S3CompatibleProvider()
 
+@span('upload')
 def upload_file(file_path: str) -> str:
+    job = current_job()
+    if job is not None and job.keep_outputs_local:
+        # Intermediate pipeline output: the next step reads it from local disk
+        url = keep_pipeline_file(file_path)
+        logger.info(f"Keeping pipeline output on local disk: {url}")
+        return url
+
     provider = get_storage_provider()
     try:
         logger.info(f"Uploading file to cloud storage: {file_path}")
+        report_progress(stage='upload', percent=0)
+        started, size = time.time(), os.path.getsize(file_path)
         url = provider.upload_file(file_path)
+        record_transfer('upload', size, time.time() - started)
+        report_progress(stage='upload', percent=100)
         logger.info(f"File uploaded successfully: {url}")
         return url
     except Exception as e:
@@ -0,0 +1,80 @@
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor, wait
+from services.sqlite_db import prepare_database, connect, transaction
+from services.file_management import find_input_urls
+from services.ffmpeg_toolkit import probe_duration
+
+logger = logging.getLogger(__name__)
+
+PROBE_TIMEOUT = 15  # ⏱️ Seconds ffprobe may spend reading the headers of a remote input
+PROBE_CONCURRENCY = 4  # 🧵 Inputs probed at the same time for multi-input endpoints
+PROBE_BUDGET = 20  # ⏱️ Seconds the request thread waits for all the probes of a job; past it the job gets no estimate
+
+def probe_media_duration(data, ignored_fields=("webhook_url",)):
+    """⏱️ Total seconds of media in the inputs of a request, or None if no input has a duration (images, documents) or probing ran out of time"""
+    urls = sorted(find_input_urls(data, ignored_fields))
+    if not urls:
+        return None
+    pool = ThreadPoolExecutor(max_workers=min(len(urls), PROBE_CONCURRENCY))
+    futures = [pool.submit(probe_duration, url, timeout=PROBE_TIMEOUT) for url in urls]
+    done, not_done = wait(futures, timeout=PROBE_BUDGET)
+    pool.shutdown(wait=False, cancel_futures=True)  # 🚪 Slow inputs do not hold up the request past the budget
+    if not_done:
+        # 📉 A partial total would understate the job, so it is accepted without an estimate
+        logger.info(f"Probed {len(done)} of {len(urls)} inputs within {PROBE_BUDGET}s; skipping the estimate")
+        return None
+    durations = [d for d in (future.result() for future in done) if d]
+    return sum(durations) if durations else None
+
+class CostModel:
+    """📈 Per-endpoint seconds of run_time per second of media, learned from finished jobs and shared by every worker"""
+
+    def __init__(self, path, smoothing):
+        self.path = path
+        self.smoothing = smoothing
+        prepare_database(path, [
+            """
+            CREATE TABLE IF NOT EXISTS cost_model (
+                endpoint TEXT PRIMARY KEY,
+                seconds_per_media_second REAL NOT NULL,
+                samples INTEGER NOT NULL,
+                updated_at REAL NOT NULL
+            )
+            """
+        ])
+
+    def observe(self, endpoint, media_duration, run_time):
+        """📝 Fold the run_time of a finished job into the exponential moving average of its endpoint"""
+        if not media_duration or media_duration <= 0:
+            return
+        cost = run_time / media_duration
+        with transaction(self.path) as conn:
+            row = conn.execute("SELECT seconds_per_media_second FROM cost_model WHERE endpoint = ?", (endpoint,)).fetchone()
+            if row is not None:
+                cost = row[0] + self.smoothing * (cost - row[0])
+            conn.execute(
+                "INSERT INTO cost_model (endpoint, seconds_per_media_second, samples, updated_at) VALUES (?, ?, 1, ?) "
+                "ON CONFLICT(endpoint) DO UPDATE SET seconds_per_media_second = excluded.seconds_per_media_second, "
+                "samples = samples + 1, updated_at = excluded.updated_at",
+                (endpoint, cost, time.time())
+            )
+
+    def has_history(self, endpoint):
+        """🔍 Whether finished jobs of the endpoint already taught the model its cost"""
+        with connect(self.path) as conn:
+            return conn.execute("SELECT 1 FROM cost_model WHERE endpoint = ?", (endpoint,)).fetchone() is not None
+
+    def predict(self, endpoint, media_duration):
+        """🔮 Expected run_time of a job with this much media, or None before the endpoint has any history"""
+        if not media_duration:
+            return None
+        with connect(self.path) as conn:
+            row = conn.execute("SELECT seconds_per_media_second FROM cost_model WHERE endpoint = ?", (endpoint,)).fetchone()
+        return row[0] * media_duration if row else None
+
+    def snapshot(self):
+        """📊 Current cost of every endpoint"""
+        with connect(self.path) as conn:
+            rows = conn.execute("SELECT endpoint, seconds_per_media_second, samples FROM cost_model ORDER BY endpoint").fetchall()
+        return {endpoint: {"seconds_per_media_second": round(cost, 4), "samples": samples} for endpoint, cost, samples in rows}
@@ -1,7 +1,7 @@
 import os
-import subprocess
 import json
 from services.file_management import download_file
+from services.ffmpeg_toolkit import run_ffmpeg
 
 STORAGE_PATH = "/tmp/"
 
@@ -20,7 +20,7 @@ def process_keyframe_extraction(video_url, job_id):
 
     print(f"Images: {cmd}")
 
-    subprocess.run(cmd, check=True)
+    run_ffmpeg(cmd)
 
     # Upload keyframes to GCS and get URLs
     output_filenames = []
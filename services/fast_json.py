@@ -0,0 +1,45 @@
+import os
+import json
+from flask.json.provider import DefaultJSONProvider
+
+# ⚡ orjson is optional: when installed it encodes and parses API responses, webhooks and the job journal
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+FAST_JSON = os.environ.get('FAST_JSON', 'true').lower() not in ('0', 'false', 'no')  # 🔌 Set to false to always use the json module
+enabled = orjson is not None and FAST_JSON
+
+def dumps(obj, sort_keys=False, default=None):
+    """📤 Compact JSON text of obj, with orjson when enabled; anything orjson cannot encode goes through the json module"""
+    if enabled:
+        option = orjson.OPT_SORT_KEYS if sort_keys else 0
+        if default is not None:
+            # 🕐 Dates and dataclasses keep the format the default function gives them
+            option |= orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+        try:
+            return orjson.dumps(obj, default=default, option=option).decode()
+        except TypeError:  # 🔢 Non-string keys, integers over 64 bits, unsupported types
+            pass
+    return json.dumps(obj, sort_keys=sort_keys, default=default, separators=(',', ':'))
+
+def loads(text):
+    """📥 Parse JSON text, with orjson when enabled; NaN and Infinity written by the json module are still accepted"""
+    if enabled:
+        try:
+            return orjson.loads(text)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(text)
+
+class FastJSONProvider(DefaultJSONProvider):
+    """⚡ Flask JSON provider for request bodies and jsonify responses backed by dumps and loads"""
+
+    def dumps(self, obj, **kwargs):
+        if kwargs.get('indent'):  # 🐛 Pretty-printed debug responses stay with the json module
+            return super().dumps(obj, **kwargs)
+        return dumps(obj, sort_keys=self.sort_keys, default=self.default)
+
+    def loads(self, s, **kwargs):
+        return loads(s)
@@ -1,11 +1,121 @@
 import os
 import ffmpeg
 import requests
+import time
+import signal
+import subprocess
+import threading
 from services.file_management import download_file
+from services.job_context import report_progress, check_cancelled, track_process, untrack_process, span
+from services.metrics import record_ffmpeg_speed
 
 # Set the default local storage directory
 STORAGE_PATH = "/tmp/"
 
+def run_process(cmd, check=False, timeout=None):
+    """
+    Drop-in for subprocess.run(cmd, capture_output=True, text=True) for ffprobe/ffmpeg helpers that need no progress.
+    The child gets its own process group and is tracked by the current job, so cancellation and the
+    time limit watchdog can kill it. Raises subprocess.TimeoutExpired after killing it when timeout passes.
+    """
+    check_cancelled()
+    process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, start_new_session=True)
+    track_process(process)
+    try:
+        stdout, stderr = process.communicate(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+        process.communicate()
+        raise
+    finally:
+        untrack_process(process)
+    check_cancelled()
+    if check and process.returncode != 0:
+        raise subprocess.CalledProcessError(process.returncode, cmd, stdout, stderr)
+    return subprocess.CompletedProcess(cmd, process.returncode, stdout, stderr)
+
+@span('probe')
+def probe_duration(file_path, timeout=None):
+    """Return the media duration in seconds reported by ffprobe (for a local path or a URL), or None if it cannot be read."""
+    cmd = ['ffprobe', '-v', 'error', '-show_entries', 'format=duration', '-of', 'default=noprint_wrappers=1:nokey=1', file_path]
+    try:
+        result = run_process(cmd, timeout=timeout)
+        return float(result.stdout.strip())
+    except (subprocess.TimeoutExpired, ValueError):
+        return None
+
+def _first_input_duration(cmd):
+    """Probe the first local '-i' input of an FFmpeg command."""
+    for flag, value in zip(cmd, cmd[1:]):
+        if flag == '-i' and os.path.isfile(value):
+            return probe_duration(value)
+    return None
+
+def _parse_progress_time(progress):
+    # FFmpeg reports out_time_us (and the historically misnamed out_time_ms) in microseconds
+    for key in ('out_time_us', 'out_time_ms'):
+        try:
+            return int(progress[key]) / 1_000_000
+        except (KeyError, ValueError):
+            continue
+    return None
+
+def run_ffmpeg(cmd, duration=None, stage='render'):
+    """
+    Run an FFmpeg command and report its -progress output (percent, frame, fps, speed) as job progress.
+    Raises subprocess.CalledProcessError carrying the captured stderr when FFmpeg fails,
+    and JobCancelled when the job is cancelled while FFmpeg runs.
+    """
+    cmd = list(cmd)
+    if duration is None:
+        duration = _first_input_duration(cmd)
+    cmd[1:1] = ['-progress', 'pipe:1', '-nostats']
+    with span(stage):
+        return _run_with_progress(cmd, duration, stage)
+
+def _run_with_progress(cmd, duration, stage):
+    check_cancelled()
+    report_progress(stage=stage, percent=0 if duration else None)
+    # Own process group, so cancelling the job can kill FFmpeg and anything it spawned
+    started = time.time()
+    process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, start_new_session=True)
+    track_process(process)
+
+    # Drain stderr in the background so FFmpeg never blocks on a full pipe
+    stderr_lines = []
+    stderr_reader = threading.Thread(target=lambda: stderr_lines.extend(process.stderr), daemon=True)
+    stderr_reader.start()
+
+    progress = {}
+    encoded = None  # Seconds of media written so far
+    for line in process.stdout:
+        key, _, value = line.strip().partition('=')
+        if key != 'progress':
+            progress[key] = value
+            continue
+        out_time = _parse_progress_time(progress)
+        if out_time is not None:
+            encoded = out_time
+        report_progress(
+            stage=stage,
+            percent=out_time / duration * 100 if duration and out_time is not None else None,
+            **{key: progress[key] for key in ('frame', 'fps', 'speed') if key in progress}
+        )
+        progress = {}
+
+    process.wait()
+    untrack_process(process)
+    stderr_reader.join()
+    stderr = ''.join(stderr_lines)
+    check_cancelled()
+    if process.returncode != 0:
+        raise subprocess.CalledProcessError(process.returncode, cmd, None, stderr)
+    record_ffmpeg_speed(stage, encoded, time.time() - started)
+    return subprocess.CompletedProcess(cmd, process.returncode, None, stderr)
+
 def process_conversion(media_url, job_id, bitrate='128k', webhook_url=None):
     """Convert media to MP3 format with specified bitrate."""
     input_filename = download_file(media_url, os.path.join(STORAGE_PATH, f"{job_id}_input"))
@@ -14,12 +124,12 @@ def process_conversion(media_url, job_id, bitrate='128k', webhook_url=None):
 
     try:
         # Convert media file to MP3 with specified bitrate
-        (
+        run_ffmpeg(
             ffmpeg
             .input(input_filename)
             .output(output_path, acodec='libmp3lame', audio_bitrate=bitrate)
             .overwrite_output()
-            .run(capture_stdout=True, capture_stderr=True)
+            .compile()
         )
         os.remove(input_filename)
         print(f"Conversion successful: {output_path} with bitrate {bitrate}")
@@ -55,10 +165,12 @@ def process_video_combination(media_urls, job_id, webhook_url=None):
                 concat_file.write(f"file '{os.path.abspath(input_file)}'\n")
 
         # Use the concat demuxer to concatenate the videos
-        (
+        durations = [probe_duration(f) for f in input_files]
+        run_ffmpeg(
             ffmpeg.input(concat_file_path, format='concat', safe=0).
                 output(output_path, c='copy').
-                run(overwrite_output=True)
+                compile(overwrite_output=True),
+            duration=sum(durations) if None not in durations else None
         )
 
         # Clean up input files
@@ -1,9 +1,53 @@
 import os
 import uuid
+import time
+import shutil
 import requests
 from urllib.parse import urlparse, parse_qs
+from services.job_context import current_job, report_progress, check_cancelled, track_file, span
+from services.metrics import record_transfer
 
+# (connect, read) timeouts in seconds of the HTTP transfers jobs make. The read timeout is the longest silence allowed
+# between two chunks, so a server that stops answering fails the job instead of blocking its consumer thread for good.
+TRANSFER_TIMEOUT = (10, float(os.environ.get('TRANSFER_READ_TIMEOUT', 60)))
+
+def pipeline_file_path(url):
+    """Resolve a file:// URL produced by an earlier pipeline step, refusing anything outside the running pipeline's directory."""
+    job = current_job()
+    pipeline_dir = os.path.realpath(job.pipeline_dir) if job is not None and job.pipeline_dir else None
+    path = os.path.realpath(urlparse(url).path)
+    if pipeline_dir is None or os.path.commonpath([path, pipeline_dir]) != pipeline_dir:
+        raise ValueError(f"Local file URLs are only accepted between pipeline steps: {url}")
+    return path
+
+
+def _link_or_copy(source, destination):
+    try:
+        os.link(source, destination)
+    except OSError:
+        shutil.copyfile(source, destination)
+
+
+def keep_pipeline_file(file_path):
+    """Keep a step output in the pipeline directory instead of uploading it, returning its file:// URL."""
+    job = current_job()
+    kept_path = os.path.join(job.pipeline_dir, f"{uuid.uuid4()}_{os.path.basename(file_path)}")
+    _link_or_copy(file_path, kept_path)
+    return f"file://{kept_path}"
+
+
+@span('download')
 def download_file(url, storage_path="/tmp/"):
+    if url.startswith('file://'):
+        # Output of an earlier pipeline step: link it instead of downloading
+        source = pipeline_file_path(url)
+        os.makedirs(storage_path, exist_ok=True)
+        local_filename = os.path.join(storage_path, f"{uuid.uuid4()}{os.path.splitext(source)[1]}")
+        _link_or_copy(source, local_filename)
+        track_file(local_filename)
+        report_progress(stage='download', percent=100, bytes=os.path.getsize(local_filename))
+        return local_filename
+
     # Parse the URL to extract the file ID from the query parameters
     parsed_url = urlparse(url)
     query_params = parse_qs(parsed_url.query)
@@ -21,17 +65,68 @@ def download_file(url, storage_path="/tmp/"):
     # Use the file ID as the filename and save it in the specified storage path
     local_filename = os.path.join(storage_path, f"{file_id}.mp4")  # Assuming mp4; adjust extension if needed
     
-    # Download the file
-    response = requests.get(url, stream=True)
+    # Download the file, reporting the bytes received as job progress
+    started = time.time()
+    response = requests.get(url, stream=True, timeout=TRANSFER_TIMEOUT)
     response.raise_for_status()
+    total_bytes = int(response.headers.get('Content-Length', 0) or 0)
+    downloaded_bytes = 0
+    report_progress(stage='download', percent=0 if total_bytes else None, bytes=0, total_bytes=total_bytes or None)
     
+    track_file(local_filename)
     with open(local_filename, 'wb') as f:
         for chunk in response.iter_content(chunk_size=8192):
+            check_cancelled()
             f.write(chunk)
+            downloaded_bytes += len(chunk)
+            report_progress(
+                stage='download',
+                percent=downloaded_bytes / total_bytes * 100 if total_bytes else None,
+                bytes=downloaded_bytes
+            )
     
+    record_transfer('download', downloaded_bytes, time.time() - started)
+
+    job = current_job()
+    if job is not None and job.measure_media:
+        # Duration for the cost model of a job that was not probed when it was queued; the local file is quick to read
+        from services.ffmpeg_toolkit import probe_duration
+        duration = probe_duration(local_filename)
+        if duration:
+            job.media_duration = (job.media_duration or 0) + duration
     return local_filename
 
 
+def find_input_urls(data, ignored_fields=("webhook_url",)):
+    """Return the set of http(s) URLs found at any depth of a request payload, skipping the ignored top-level fields."""
+    urls = set()
+    pending = [value for key, value in data.items() if key not in ignored_fields]
+    while pending:
+        value = pending.pop()
+        if isinstance(value, str) and value.startswith(('http://', 'https://')):
+            urls.add(value)
+        elif isinstance(value, dict):
+            pending.extend(value.values())
+        elif isinstance(value, list):
+            pending.extend(value)
+    return urls
+
+
+def remove_job_files(job_id, paths=(), storage_path="/tmp/"):
+    """Remove the given temporary files plus every file in storage_path named after the job."""
+    paths = set(paths)
+    if os.path.isdir(storage_path):
+        paths.update(os.path.join(storage_path, name) for name in os.listdir(storage_path) if name.startswith(job_id))
+    removed = 0
+    for path in paths:
+        try:
+            os.remove(path)
+            removed += 1
+        except (FileNotFoundError, IsADirectoryError, PermissionError):
+            continue
+    return removed
+
+
 def delete_old_files():
     now = time.time()
     for filename in os.listdir(STORAGE_PATH):
@@ -1,8 +1,7 @@
 import os
 import json
 import logging
-from google.oauth2 import service_account
-from google.cloud import storage
+import threading
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -12,8 +11,14 @@ logger = logging.getLogger(__name__)
 GCP_BUCKET_NAME = os.getenv('GCP_BUCKET_NAME')
 STORAGE_PATH = "/tmp/"
 gcs_client = None
+_gcs_client_lock = threading.Lock()
+_gcs_client_ready = False
 
 def initialize_gcp_client():
+    # Imported here so workers that never upload to GCS do not load the Google Cloud libraries
+    from google.oauth2 import service_account
+    from google.cloud import storage
+
     GCP_SA_CREDENTIALS = os.getenv('GCP_SA_CREDENTIALS')
 
     if not GCP_SA_CREDENTIALS:
@@ -34,10 +39,17 @@ def initialize_gcp_client():
         logger.error(f"Failed to initialize GCS client: {e}")
         return None
 
-# Initialize the GCS client
-gcs_client = initialize_gcp_client()
+def get_gcs_client():
+    """Build the GCS client on first use and reuse it afterwards."""
+    global gcs_client, _gcs_client_ready
+    with _gcs_client_lock:
+        if not _gcs_client_ready:
+            gcs_client = initialize_gcp_client()
+            _gcs_client_ready = True
+        return gcs_client
 
 def upload_to_gcs(file_path, bucket_name=GCP_BUCKET_NAME):
+    gcs_client = get_gcs_client()
     if not gcs_client:
         raise ValueError("GCS client is not initialized. Skipping file upload.")
 
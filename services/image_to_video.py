@@ -2,7 +2,7 @@ import os
 import subprocess
 import logging
 from services.file_management import download_file
-from PIL import Image
+from services.ffmpeg_toolkit import run_ffmpeg
 
 STORAGE_PATH = "/tmp/"
 logger = logging.getLogger(__name__)
@@ -13,7 +13,8 @@ def process_image_to_video(image_url, length, frame_rate, zoom_speed, job_id, we
         image_path = download_file(image_url, STORAGE_PATH)
         logger.info(f"Downloaded image to {image_path}")
 
-        # Get image dimensions using Pillow
+        # Get image dimensions using Pillow, imported on first use to keep worker startup fast
+        from PIL import Image
         with Image.open(image_path) as img:
             width, height = img.size
         logger.info(f"Original image dimensions: {width}x{height}")
@@ -47,10 +48,11 @@ def process_image_to_video(image_url, length, frame_rate, zoom_speed, job_id, we
         logger.info(f"Running FFmpeg command: {' '.join(cmd)}")
 
         # Run FFmpeg command
-        result = subprocess.run(cmd, capture_output=True, text=True)
-        if result.returncode != 0:
-            logger.error(f"FFmpeg command failed. Error: {result.stderr}")
-            raise subprocess.CalledProcessError(result.returncode, cmd, result.stdout, result.stderr)
+        try:
+            run_ffmpeg(cmd, duration=length)
+        except subprocess.CalledProcessError as e:
+            logger.error(f"FFmpeg command failed. Error: {e.stderr}")
+            raise
 
         logger.info(f"Video created successfully: {output_path}")
 
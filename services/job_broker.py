@@ -0,0 +1,161 @@
+import json
+import time
+import threading
+import logging
+from services.job_queue import JobQueue
+from services.sqlite_db import prepare_database, connect, transaction
+
+logger = logging.getLogger(__name__)
+
+class LocalBroker:
+    """📥 In-memory broker: one JobQueue per lane, private to this process"""
+
+    shared = False  # 🔒 Queued jobs are lost with the process that accepted them
+
+    def __init__(self, lanes):
+        self.queues = {lane: JobQueue() for lane in lanes}
+
+    def put(self, job):
+        self.queues[job["lane"]].put_job(job, priority=job["priority"], deadline=job["deadline"])
+
+    def put_many(self, jobs):
+        for job in jobs:
+            self.put(job)
+
+    def get(self, lane, timeout=None):
+        return self.queues[lane].get_job(timeout)
+
+    def task_done(self, lane):
+        self.queues[lane].task_done()
+
+    def qsize(self, lane=None):
+        if lane is not None:
+            return self.queues[lane].qsize()
+        return sum(lane_queue.qsize() for lane_queue in self.queues.values())
+
+    def jobs_ahead(self, lane, priority=0, deadline=None):
+        return self.queues[lane].jobs_ahead(priority, deadline)
+
+    def remove(self, job_id):
+        return any(lane_queue.remove_job(job_id) for lane_queue in self.queues.values())
+
+    def take_all(self):
+        """📤 Empty every lane, returning the jobs so a draining worker can hand them to its peers"""
+        return [job for lane_queue in self.queues.values() for job in lane_queue.take_all()]
+
+class SQLiteBroker:
+    """🗄️ Broker shared by every gunicorn worker through a local SQLite database in WAL mode"""
+
+    shared = True  # 🤝 Queued jobs outlive the process that accepted them
+
+    NO_DEADLINE = 1e308  # ♾️ Sort key used for jobs without a deadline
+    CLAIM_GRACE = 60  # ⏳ Seconds a claimed job counts as waiting, covering the gap until its consumer journals the start
+
+    def __init__(self, path, poll_interval=0.5):
+        self.path = path
+        self.poll_interval = poll_interval
+        self.wakeup = threading.Condition()  # 🔔 Wakes local consumers right away when this process enqueues
+
+        prepare_database(path, [
+            """
+            CREATE TABLE IF NOT EXISTS queued_jobs (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                job_id TEXT NOT NULL,
+                lane TEXT NOT NULL,
+                priority INTEGER NOT NULL,
+                deadline REAL,
+                job TEXT NOT NULL
+            )
+            """,
+            "CREATE INDEX IF NOT EXISTS queued_jobs_lane ON queued_jobs (lane, priority DESC, deadline, seq)",
+            "CREATE TABLE IF NOT EXISTS claimed_jobs (job_id TEXT PRIMARY KEY, claimed_at REAL NOT NULL)"
+        ])
+        logger.info(f"Shared queue broker ready at {path}")
+
+    def put(self, job):
+        with connect(self.path) as conn:
+            conn.execute(
+                "INSERT INTO queued_jobs (job_id, lane, priority, deadline, job) VALUES (?, ?, ?, ?, ?)",
+                (job["job_id"], job["lane"], job["priority"], job["deadline"], json.dumps(job))
+            )
+        with self.wakeup:
+            self.wakeup.notify_all()
+
+    def put_many(self, jobs):
+        with transaction(self.path) as conn:
+            conn.executemany(
+                "INSERT INTO queued_jobs (job_id, lane, priority, deadline, job) VALUES (?, ?, ?, ?, ?)",
+                [(job["job_id"], job["lane"], job["priority"], job["deadline"], json.dumps(job)) for job in jobs]
+            )
+        with self.wakeup:
+            self.wakeup.notify_all()
+
+    def _claim(self, lane):
+        """🔒 Atomically remove and return the next job of a lane, or None if the lane is empty"""
+        now = time.time()
+        with transaction(self.path) as conn:
+            row = conn.execute(
+                "SELECT seq, job FROM queued_jobs WHERE lane = ? "
+                "ORDER BY priority DESC, COALESCE(deadline, ?), seq LIMIT 1",
+                (lane, self.NO_DEADLINE)
+            ).fetchone()
+            if row is None:
+                return None
+            job = json.loads(row[1])
+            conn.execute("DELETE FROM queued_jobs WHERE seq = ?", (row[0],))
+            # 🏷️ Remembered for a while so the orphan sweep does not replay it before its consumer journals the start
+            conn.execute("DELETE FROM claimed_jobs WHERE claimed_at < ?", (now - self.CLAIM_GRACE,))
+            conn.execute("INSERT OR REPLACE INTO claimed_jobs (job_id, claimed_at) VALUES (?, ?)", (job["job_id"], now))
+        return job
+
+    def get(self, lane, timeout=None):
+        give_up = None if timeout is None else time.monotonic() + timeout
+        while True:
+            job = self._claim(lane)
+            if job is not None:
+                return job
+            if give_up is not None and time.monotonic() >= give_up:
+                return None
+            with self.wakeup:
+                self.wakeup.wait(self.poll_interval if give_up is None else min(self.poll_interval, max(give_up - time.monotonic(), 0)))
+
+    def task_done(self, lane):
+        pass  # ✅ Claimed jobs are already removed from the shared table
+
+    def qsize(self, lane=None):
+        with connect(self.path) as conn:
+            if lane is not None:
+                return conn.execute("SELECT COUNT(*) FROM queued_jobs WHERE lane = ?", (lane,)).fetchone()[0]
+            return conn.execute("SELECT COUNT(*) FROM queued_jobs").fetchone()[0]
+
+    def jobs_ahead(self, lane, priority=0, deadline=None):
+        key = deadline if deadline is not None else self.NO_DEADLINE
+        with connect(self.path) as conn:
+            return conn.execute(
+                "SELECT COUNT(*) FROM queued_jobs WHERE lane = ? "
+                "AND (priority > ? OR (priority = ? AND COALESCE(deadline, ?) <= ?))",
+                (lane, priority, priority, self.NO_DEADLINE, key)
+            ).fetchone()[0]
+
+    def remove(self, job_id):
+        with connect(self.path) as conn:
+            return conn.execute("DELETE FROM queued_jobs WHERE job_id = ?", (job_id,)).rowcount > 0
+
+    def take_all(self):
+        return []  # 🤝 Queued jobs already live in the shared table, where any other worker claims them
+
+    def queued_ids(self):
+        """🔍 Ids of the jobs waiting in the shared table or claimed from it within the last CLAIM_GRACE seconds"""
+        with connect(self.path) as conn:
+            return {row[0] for row in conn.execute(
+                "SELECT job_id FROM queued_jobs UNION SELECT job_id FROM claimed_jobs WHERE claimed_at >= ?",
+                (time.time() - self.CLAIM_GRACE,)
+            )}
+
+def create_broker(kind, lanes, path):
+    """🔍 Build the broker selected by QUEUE_BROKER"""
+    if kind == 'sqlite':
+        return SQLiteBroker(path)
+    if kind != 'local':
+        raise ValueError(f"Unknown QUEUE_BROKER '{kind}'. Use 'local' or 'sqlite'")
+    return LocalBroker(lanes)
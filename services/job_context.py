@@ -0,0 +1,185 @@
+import os
+import time
+import signal
+import threading
+from contextlib import contextmanager
+
+_local = threading.local()
+_running = {}  # 🗂️ Contexts of the jobs running in this process, by job_id
+_running_lock = threading.Lock()
+
+class JobCancelled(Exception):
+    """🛑 Raised inside a task when its job has been cancelled"""
+
+class JobContext:
+    """📌 State of the job running in the current thread, used by services to report progress"""
+
+    PROGRESS_INTERVAL = 1.0  # ⏱️ Minimum seconds between two progress reports of the same stage
+
+    def __init__(self, job_id, on_progress=None):
+        self.job_id = job_id
+        self.on_progress = on_progress
+        self.stage = None
+        self.percent = None
+        self.details = {}
+        self._last_report = 0.0
+        self.cancelled = threading.Event()
+        self.processes = set()  # ⚙️ Child processes to tear down on cancellation
+        self.files = set()  # 📁 Temporary files to remove on cancellation
+        self.pipeline_dir = None  # 🔗 Directory holding intermediate outputs while a pipeline runs
+        self.keep_outputs_local = False  # 📁 Set for pipeline steps whose output feeds a later step
+        self.profiling = False  # 🔬 Set while the job runs under the profiler
+        self.stages = {}  # ⏱️ Seconds spent in each stage (download, transcribe, render, upload...), summed over repeats
+        self.started = time.monotonic()
+        self.thread_id = threading.get_native_id()  # 🧵 OS id of the thread running the task, whose CPU time the watchdog reads
+        self.run_time_limit = None  # ⏲️ Wall-clock seconds the job may run, enforced by the watchdog
+        self.cpu_time_limit = None  # ⏲️ CPU seconds of the job's thread and child processes
+        self.child_cpu = {}  # ⚙️ Latest CPU seconds sampled for each child process, by pid
+        self.timed_out = None  # ⏲️ Reason, once the watchdog stopped the job for exceeding a limit
+        self.measure_media = False  # ⏱️ Set for jobs queued without a media duration, so downloads measure it for the cost model
+        self.media_duration = None  # ⏱️ Seconds of media downloaded so far when measure_media is set
+        self._lock = threading.Lock()
+
+    def report(self, stage=None, percent=None, **details):
+        stage_changed = stage is not None and stage != self.stage
+        if stage_changed:
+            self.stage = stage
+            self.details = {}
+        if percent is not None:
+            self.percent = round(min(max(percent, 0.0), 100.0), 1)
+        elif stage_changed:
+            self.percent = None
+        self.details.update(details)
+
+        now = time.monotonic()
+        if self.on_progress and (stage_changed or self.percent == 100.0 or now - self._last_report >= self.PROGRESS_INTERVAL):
+            self._last_report = now
+            self.on_progress(self.job_id, self.stage, self.percent, dict(self.details))
+
+    def add_stage_time(self, stage, seconds):
+        with self._lock:
+            self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+    def stage_times(self):
+        """⏱️ Seconds per stage, rounded for responses"""
+        with self._lock:
+            return {stage: round(seconds, 3) for stage, seconds in self.stages.items()}
+
+    def add_process(self, process):
+        """⚙️ Track a child process started with start_new_session=True, killing it at once if the job is already cancelled"""
+        with self._lock:
+            self.processes.add(process)
+        if self.cancelled.is_set():
+            self._kill(process)
+
+    def remove_process(self, process):
+        with self._lock:
+            self.processes.discard(process)
+
+    def cancel(self):
+        """🛑 Flag the job as cancelled and kill the process group of every child it is waiting on"""
+        self.cancelled.set()
+        with self._lock:
+            processes = list(self.processes)
+        for process in processes:
+            self._kill(process)
+
+    def time_out(self, reason):
+        """⏲️ Stop a job that exceeded its time limit: like a cancellation, but it fails with reason"""
+        self.timed_out = reason
+        self.cancel()
+
+    def running_processes(self):
+        with self._lock:
+            return list(self.processes)
+
+    @staticmethod
+    def _kill(process):
+        try:
+            os.killpg(process.pid, signal.SIGKILL)  # 💀 The whole group, so helpers spawned by ffmpeg die too
+        except (ProcessLookupError, PermissionError):
+            pass
+
+    def check_cancelled(self):
+        if self.cancelled.is_set():
+            raise JobCancelled(f"Job {self.job_id} was cancelled")
+
+@contextmanager
+def job_context(job_id, on_progress=None):
+    """🔗 Bind a job to the current thread while its task function runs"""
+    previous = getattr(_local, 'job', None)
+    _local.job = JobContext(job_id, on_progress)
+    with _running_lock:
+        _running[job_id] = _local.job
+    try:
+        yield _local.job
+    finally:
+        with _running_lock:
+            _running.pop(job_id, None)
+        _local.job = previous
+
+def current_job():
+    """🔍 Job bound to the current thread, or None outside of a job"""
+    return getattr(_local, 'job', None)
+
+def report_progress(stage=None, percent=None, **details):
+    """📊 Report the stage (download, transcribe, render, upload) and percent complete of the current job"""
+    job = current_job()
+    if job is not None:
+        job.report(stage, percent, **details)
+
+@contextmanager
+def span(stage):
+    """
+    ⏱️ Time a stage of the current job with a monotonic clock; also usable as a function decorator.
+    Repeated stages add up. Outside of a job it does nothing.
+    """
+    job = current_job()
+    started = time.monotonic()
+    try:
+        yield
+    finally:
+        if job is not None:
+            job.add_stage_time(stage, time.monotonic() - started)
+
+def check_cancelled():
+    """🛑 Raise JobCancelled if the current job has been cancelled; call it between units of work"""
+    job = current_job()
+    if job is not None:
+        job.check_cancelled()
+
+def track_process(process):
+    """⚙️ Let cancellation of the current job kill this child process"""
+    job = current_job()
+    if job is not None:
+        job.add_process(process)
+
+def untrack_process(process):
+    job = current_job()
+    if job is not None:
+        job.remove_process(process)
+
+def track_file(path):
+    """📁 Remove this temporary file if the current job is cancelled"""
+    job = current_job()
+    if job is not None:
+        with job._lock:
+            job.files.add(path)
+
+def running_job_ids():
+    """🔍 Ids of the jobs running in this process"""
+    with _running_lock:
+        return list(_running)
+
+def running_jobs():
+    """🔍 Contexts of the jobs running in this process"""
+    with _running_lock:
+        return list(_running.values())
+
+def cancel_running_job(job_id):
+    """🛑 Cancel a job if it is running in this process, returning its context or None"""
+    with _running_lock:
+        job = _running.get(job_id)
+    if job is not None:
+        job.cancel()
+    return job
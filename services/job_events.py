@@ -0,0 +1,56 @@
+import os
+import json
+import time
+from services.job_store import RUNNING, FINISHED_STATES
+
+# 📡 Server-Sent Events stream of a job's state changes and progress, read from the shared job journal
+EVENTS_POLL_INTERVAL = 0.5  # ⏱️ Seconds between two reads of the journal
+EVENTS_KEEPALIVE = 15  # 💓 Seconds of silence before a comment line keeps proxies from closing the stream
+# ⏳ Longest a single stream stays open; EventSource clients reconnect on their own with Last-Event-ID.
+# Kept well below the gunicorn timeout, which a worker busy with one long request would otherwise hit
+GUNICORN_TIMEOUT = float(os.environ.get('GUNICORN_TIMEOUT', 300))
+EVENTS_MAX_STREAM_SECONDS = min(float(os.environ.get('EVENTS_MAX_STREAM_SECONDS', 120)), GUNICORN_TIMEOUT / 2)
+EVENTS_RETRY_MS = 1000  # 🔁 Reconnection delay suggested to the client
+
+def format_event(event, data, event_id=None):
+    """📨 One SSE message"""
+    lines = [f"id: {event_id}"] if event_id is not None else []
+    lines += [f"event: {event}", f"data: {json.dumps(data, separators=(',', ':'))}"]
+    return "\n".join(lines) + "\n\n"
+
+def job_event_stream(job_store, job_id, last_event_id=0):
+    """
+    📡 Yield SSE messages for a job: a 'state' event for every journaled state change after last_event_id,
+    a 'progress' event whenever its stage, percent or details change, and a final 'result' event with the
+    webhook payload once it finishes, which ends the stream.
+    """
+    yield f"retry: {EVENTS_RETRY_MS}\n\n"
+    opened = last_sent = time.monotonic()
+    last_progress = None
+    while True:
+        for event_id, state, at in job_store.events_since(job_id, last_event_id):
+            last_event_id = event_id
+            last_sent = time.monotonic()
+            yield format_event("state", {"job_id": job_id, "state": state, "at": at}, event_id)
+
+        job = job_store.get(job_id)
+        if job is None:
+            yield format_event("error", {"job_id": job_id, "message": "Job not found"})
+            return
+        if job["state"] in FINISHED_STATES:
+            yield format_event("result", {"job_id": job_id, "state": job["state"], "code": job["code"], "response": job["response"]})
+            return
+
+        progress = (job["stage"], job["percent"], job["progress"])
+        if job["state"] == RUNNING and progress != last_progress:
+            last_progress = progress
+            last_sent = time.monotonic()
+            yield format_event("progress", {"job_id": job_id, "stage": job["stage"], "percent": job["percent"], **job["progress"]})
+
+        now = time.monotonic()
+        if now - opened >= EVENTS_MAX_STREAM_SECONDS:
+            return
+        if now - last_sent >= EVENTS_KEEPALIVE:
+            last_sent = now
+            yield ": keepalive\n\n"
+        time.sleep(EVENTS_POLL_INTERVAL)
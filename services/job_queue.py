@@ -0,0 +1,51 @@
+import heapq
+import itertools
+import math
+from queue import PriorityQueue, Empty
+
+class JobQueue(PriorityQueue):
+    """📥 Queue that hands out jobs by priority (highest first), then earliest deadline, then arrival order."""
+
+    def __init__(self):
+        super().__init__()
+        self._sequence = itertools.count()  # 🔢 Tie-breaker so jobs with the same key stay FIFO
+
+    @staticmethod
+    def _schedule_key(priority, deadline):
+        return (-priority, deadline if deadline is not None else math.inf)
+
+    def put_job(self, job, priority=0, deadline=None):
+        """⏳ Add a job with its scheduling attributes"""
+        self.put(self._schedule_key(priority, deadline) + (next(self._sequence), job))
+
+    def get_job(self, timeout=None):
+        """📥 Block until a job is available and return it, or None if none arrived within timeout seconds"""
+        try:
+            return self.get(timeout=timeout)[-1]
+        except Empty:
+            return None
+
+    def jobs_ahead(self, priority=0, deadline=None):
+        """🔢 Number of queued jobs that would be scheduled before a new job with this priority and deadline"""
+        key = self._schedule_key(priority, deadline)
+        with self.mutex:
+            return sum(1 for entry in self.queue if entry[:2] <= key)
+
+    def take_all(self):
+        """📤 Remove and return every queued job, in scheduling order"""
+        with self.mutex:
+            jobs = [entry[-1] for entry in sorted(self.queue)]
+            self.queue[:] = []
+            self.unfinished_tasks -= len(jobs)
+            return jobs
+
+    def remove_job(self, job_id):
+        """🗑️ Drop a queued job by id, returning True if it was still waiting"""
+        with self.mutex:
+            remaining = [entry for entry in self.queue if entry[-1]["job_id"] != job_id]
+            removed = len(self.queue) - len(remaining)
+            if removed:
+                self.queue[:] = remaining
+                heapq.heapify(self.queue)
+                self.unfinished_tasks -= removed
+            return removed > 0
@@ -0,0 +1,460 @@
+import os
+import json
+import time
+import logging
+import psutil
+from services.sqlite_db import prepare_database, add_missing_columns, connect, transaction
+from services import fast_json
+
+logger = logging.getLogger(__name__)
+
+# 📋 Job states recorded in the journal
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+UNFINISHED_STATES = (QUEUED, RUNNING)
+FINISHED_STATES = (DONE, FAILED, CANCELLED)
+ALREADY_CLAIMED = 'already_claimed'  # 🔁 record_running result for a job another consumer already started or finished
+
+HANDOFF_OWNER = 'handoff'  # 🤝 Owner of queued jobs a draining worker left for any other worker to claim
+
+# ➕ Columns added to the jobs table after its first release
+EXTRA_JOB_COLUMNS = {
+    "stage": "TEXT",
+    "percent": "REAL",
+    "progress": "TEXT",
+    "cancel_requested": "INTEGER NOT NULL DEFAULT 0",
+    "idempotency_key": "TEXT",
+    "disk_bytes": "INTEGER NOT NULL DEFAULT 0",
+    "batch_id": "TEXT",
+    "api_key": "TEXT"
+}
+
+def current_owner():
+    """🖥️ Identify this process by PID and start time, so a recycled PID is not mistaken for a live owner"""
+    process = psutil.Process(os.getpid())
+    return f"{process.pid}:{process.create_time()!r}"
+
+def owner_alive(owner):
+    """🔍 Check whether the process that owns a job is still running"""
+    try:
+        pid, started = owner.split(':', 1)
+        return repr(psutil.Process(int(pid)).create_time()) == started
+    except (ValueError, psutil.Error):
+        return False
+
+class JobStore:
+    """🗄️ Persistent journal of queued jobs, their payloads and their state transitions"""
+
+    def __init__(self, path):
+        self.path = path
+        self.owner = current_owner()
+        self.started_at = psutil.Process(os.getpid()).create_time()  # 🚪 Drain requests only apply to workers started before them
+        prepare_database(path, [
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                job_id TEXT PRIMARY KEY,
+                state TEXT NOT NULL,
+                owner TEXT NOT NULL,
+                endpoint TEXT,
+                lane TEXT,
+                job TEXT NOT NULL,
+                code INTEGER,
+                response TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+            """,
+            "CREATE INDEX IF NOT EXISTS jobs_state ON jobs (state, updated_at)",
+            """
+            CREATE TABLE IF NOT EXISTS job_events (
+                job_id TEXT NOT NULL,
+                state TEXT NOT NULL,
+                owner TEXT NOT NULL,
+                at REAL NOT NULL
+            )
+            """,
+            "CREATE INDEX IF NOT EXISTS job_events_job ON job_events (job_id, at)",
+            """
+            CREATE TABLE IF NOT EXISTS job_subscribers (
+                job_id TEXT NOT NULL,
+                webhook_url TEXT,
+                request_id TEXT,
+                created_at REAL NOT NULL
+            )
+            """,
+            "CREATE INDEX IF NOT EXISTS job_subscribers_job ON job_subscribers (job_id)",
+            """
+            CREATE TABLE IF NOT EXISTS batches (
+                batch_id TEXT PRIMARY KEY,
+                webhook_url TEXT,
+                request_id TEXT,
+                total INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                finished_at REAL
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS drain_requests (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                requested_at REAL NOT NULL
+            )
+            """
+        ])
+        add_missing_columns(path, "jobs", EXTRA_JOB_COLUMNS)
+        with connect(path) as conn:
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_idempotency ON jobs (idempotency_key, state)")
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_batch ON jobs (batch_id)")
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_api_key ON jobs (api_key, state)")
+        logger.info(f"Job store ready at {path}")
+
+    def _log_event(self, conn, job_id, state, now):
+        conn.execute("INSERT INTO job_events (job_id, state, owner, at) VALUES (?, ?, ?, ?)", (job_id, state, self.owner, now))
+
+    def record_queued(self, job, idempotency_key=None):
+        """
+        📥 Journal a job accepted into the queue.
+        If an unfinished job with the same idempotency key exists, subscribe this request to it instead
+        and return that job's id; otherwise return None.
+        """
+        now = time.time()
+        with transaction(self.path) as conn:
+            if idempotency_key is not None:
+                row = conn.execute(
+                    "SELECT job_id FROM jobs WHERE idempotency_key = ? AND state IN (?, ?) LIMIT 1",
+                    (idempotency_key,) + UNFINISHED_STATES
+                ).fetchone()
+                if row is not None:
+                    conn.execute(
+                        "INSERT INTO job_subscribers (job_id, webhook_url, request_id, created_at) VALUES (?, ?, ?, ?)",
+                        (row[0], job["data"].get("webhook_url"), job["data"].get("id"), now)
+                    )
+                    self._log_event(conn, row[0], 'attached', now)
+                    return row[0]
+            conn.execute(
+                "INSERT INTO jobs (job_id, state, owner, endpoint, lane, job, idempotency_key, disk_bytes, api_key, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (job["job_id"], QUEUED, self.owner, job["endpoint"], job["lane"], json.dumps(job), idempotency_key, job.get("disk_bytes", 0), job.get("api_key"), now, now)
+            )
+            self._log_event(conn, job["job_id"], QUEUED, now)
+        return None
+
+    def record_batch(self, batch_id, jobs, webhook_url=None, request_id=None):
+        """📦 Journal every job of a batch in a single transaction"""
+        now = time.time()
+        with transaction(self.path) as conn:
+            conn.execute(
+                "INSERT INTO batches (batch_id, webhook_url, request_id, total, created_at) VALUES (?, ?, ?, ?, ?)",
+                (batch_id, webhook_url, request_id, len(jobs), now)
+            )
+            conn.executemany(
+                "INSERT INTO jobs (job_id, state, owner, endpoint, lane, job, batch_id, api_key, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(job["job_id"], QUEUED, self.owner, job["endpoint"], job["lane"], json.dumps(job), batch_id, job.get("api_key"), now, now) for job in jobs]
+            )
+            conn.executemany(
+                "INSERT INTO job_events (job_id, state, owner, at) VALUES (?, ?, ?, ?)",
+                [(job["job_id"], QUEUED, self.owner, now) for job in jobs]
+            )
+
+    def _batch_summary(self, conn, batch_id):
+        batch = conn.execute(
+            "SELECT webhook_url, request_id, total, created_at, finished_at FROM batches WHERE batch_id = ?", (batch_id,)
+        ).fetchone()
+        if batch is None:
+            return None
+        rows = conn.execute(
+            "SELECT job_id, endpoint, state, code, response FROM jobs WHERE batch_id = ? ORDER BY rowid", (batch_id,)
+        ).fetchall()
+        states = {}
+        for row in rows:
+            states[row[2]] = states.get(row[2], 0) + 1
+        return {
+            "batch_id": batch_id,
+            "id": batch[1],
+            "webhook_url": batch[0],
+            "total": batch[2],
+            "states": states,
+            "created_at": batch[3],
+            "finished_at": batch[4],
+            "jobs": [
+                {
+                    "job_id": job_id,
+                    "endpoint": endpoint,
+                    "state": state,
+                    "code": code,
+                    "response": fast_json.loads(response).get("response") if response else None
+                }
+                for job_id, endpoint, state, code, response in rows
+            ]
+        }
+
+    def get_batch(self, batch_id, client=None):
+        """🔍 Per-state counts and per-job outcomes of a batch, or None if it is unknown or, with client, submitted by another API key"""
+        with connect(self.path) as conn:
+            if client is not None and conn.execute(
+                "SELECT 1 FROM jobs WHERE batch_id = ? AND api_key = ? LIMIT 1", (batch_id, client)
+            ).fetchone() is None:
+                return None
+            return self._batch_summary(conn, batch_id)
+
+    def complete_batch_item(self, job_id):
+        """📦 After a batch job finished: the batch summary if it was the last one, exactly once, else None"""
+        now = time.time()
+        with transaction(self.path) as conn:
+            row = conn.execute("SELECT batch_id FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+            if row is None or row[0] is None:
+                return None
+            batch_id = row[0]
+            unfinished = conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE batch_id = ? AND state IN (?, ?)", (batch_id,) + UNFINISHED_STATES
+            ).fetchone()[0]
+            if unfinished or conn.execute(
+                "UPDATE batches SET finished_at = ? WHERE batch_id = ? AND finished_at IS NULL", (now, batch_id)
+            ).rowcount == 0:
+                return None
+            return self._batch_summary(conn, batch_id)
+
+    def find_in_flight(self, idempotency_key):
+        """🔍 Id of the unfinished job with this idempotency key, or None"""
+        with connect(self.path) as conn:
+            row = conn.execute(
+                "SELECT job_id FROM jobs WHERE idempotency_key = ? AND state IN (?, ?) LIMIT 1",
+                (idempotency_key,) + UNFINISHED_STATES
+            ).fetchone()
+        return row[0] if row else None
+
+    def unfinished_jobs(self, endpoint):
+        """🔢 Number of queued or running jobs of an endpoint, across every worker"""
+        with connect(self.path) as conn:
+            return conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE endpoint = ? AND state IN (?, ?)",
+                (endpoint,) + UNFINISHED_STATES
+            ).fetchone()[0]
+
+    def key_usage(self, api_key):
+        """👥 Number of queued and running jobs submitted with an API key, across every worker"""
+        with connect(self.path) as conn:
+            counts = dict(conn.execute(
+                "SELECT state, COUNT(*) FROM jobs WHERE api_key = ? AND state IN (?, ?) GROUP BY state",
+                (api_key,) + UNFINISHED_STATES
+            ).fetchall())
+        return {QUEUED: counts.get(QUEUED, 0), RUNNING: counts.get(RUNNING, 0)}
+
+    def queue_depth(self):
+        """📏 Queued and running jobs per owner process and lane: [(owner, lane, state, count)]"""
+        with connect(self.path) as conn:
+            return conn.execute(
+                "SELECT owner, lane, state, COUNT(*) FROM jobs WHERE state IN (?, ?) GROUP BY owner, lane, state",
+                UNFINISHED_STATES
+            ).fetchall()
+
+    def reserved_disk_bytes(self):
+        """💾 Disk estimated for every queued or running job, which admission control keeps free for them"""
+        with connect(self.path) as conn:
+            return conn.execute(
+                "SELECT COALESCE(SUM(disk_bytes), 0) FROM jobs WHERE state IN (?, ?)",
+                UNFINISHED_STATES
+            ).fetchone()[0]
+
+    def subscribers(self, job_id):
+        """🔔 Webhook URLs and request ids of the duplicate requests attached to a job"""
+        with connect(self.path) as conn:
+            rows = conn.execute(
+                "SELECT webhook_url, request_id FROM job_subscribers WHERE job_id = ? ORDER BY created_at",
+                (job_id,)
+            ).fetchall()
+        return [{"webhook_url": webhook_url, "id": request_id} for webhook_url, request_id in rows]
+
+    def record_running(self, job_id, max_running=None):
+        """
+        🔄 Journal that this process started running a job and return RUNNING.
+        Returns CANCELLED if it was cancelled while queued, ALREADY_CLAIMED if another consumer
+        already started it, or QUEUED if its API key already has max_running jobs running.
+        """
+        now = time.time()
+        with transaction(self.path) as conn:
+            row = conn.execute("SELECT state, api_key FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+            if row is None:
+                return None
+            if row[0] != QUEUED:
+                return CANCELLED if row[0] == CANCELLED else ALREADY_CLAIMED
+            if max_running is not None and conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE api_key = ? AND state = ?", (row[1], RUNNING)
+            ).fetchone()[0] >= max_running:
+                # 🔒 This process holds it until the retry, so it is replayed if the process dies meanwhile
+                conn.execute("UPDATE jobs SET owner = ?, updated_at = ? WHERE job_id = ?", (self.owner, now, job_id))
+                return QUEUED
+            conn.execute("UPDATE jobs SET state = ?, owner = ?, updated_at = ? WHERE job_id = ?", (RUNNING, self.owner, now, job_id))
+            self._log_event(conn, job_id, RUNNING, now)
+        return RUNNING
+
+    def record_finished(self, job_id, response_data, state=None):
+        """✅ Journal the final outcome of a job together with the payload sent to the webhook"""
+        now = time.time()
+        if state is None:
+            state = DONE if response_data.get("code") == 200 else FAILED
+        with transaction(self.path) as conn:
+            conn.execute(
+                "UPDATE jobs SET state = ?, code = ?, response = ?, updated_at = ? WHERE job_id = ?",
+                (state, response_data.get("code"), fast_json.dumps(response_data), now, job_id)
+            )
+            self._log_event(conn, job_id, state, now)
+
+    def record_progress(self, job_id, stage, percent, details):
+        """📊 Store the latest stage and percent complete reported by a running job"""
+        with connect(self.path) as conn:
+            conn.execute(
+                "UPDATE jobs SET stage = ?, percent = ?, progress = ?, updated_at = ? WHERE job_id = ?",
+                (stage, percent, json.dumps(details), time.time(), job_id)
+            )
+
+    def request_cancel(self, job_id, client=None):
+        """
+        🛑 Cancel a queued job, or flag a running one for its owner to stop. Returns the state and payload the job had,
+        (None, None) if it is unknown or, with client, submitted by another API key
+        """
+        now = time.time()
+        with transaction(self.path) as conn:
+            row = conn.execute(
+                "SELECT state, job FROM jobs WHERE job_id = ?" + (" AND api_key = ?" if client is not None else ""),
+                (job_id,) + ((client,) if client is not None else ())
+            ).fetchone()
+            if row is None:
+                return None, None
+            state, job = row
+            if state == QUEUED:
+                # 📝 The caller records the final response, which logs the cancelled event
+                conn.execute("UPDATE jobs SET state = ?, updated_at = ? WHERE job_id = ?", (CANCELLED, now, job_id))
+            elif state == RUNNING:
+                conn.execute("UPDATE jobs SET cancel_requested = 1, updated_at = ? WHERE job_id = ?", (now, job_id))
+                self._log_event(conn, job_id, 'cancel_requested', now)
+        return state, json.loads(job)
+
+    def cancel_requested(self, job_ids):
+        """🔍 Which of the given running jobs have been asked to stop"""
+        if not job_ids:
+            return []
+        placeholders = ", ".join("?" for _ in job_ids)
+        with connect(self.path) as conn:
+            rows = conn.execute(
+                f"SELECT job_id FROM jobs WHERE cancel_requested = 1 AND job_id IN ({placeholders})",
+                tuple(job_ids)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def events_since(self, job_id, after=0):
+        """📜 State changes of a job journaled after event number `after`: [(event number, state, at)]"""
+        with connect(self.path) as conn:
+            return conn.execute(
+                "SELECT rowid, state, at FROM job_events WHERE job_id = ? AND rowid > ? ORDER BY rowid",
+                (job_id, after)
+            ).fetchall()
+
+    def get(self, job_id, client=None):
+        """🔍 Current state, progress and final response of a job, or None if it is unknown or, with client, submitted by another API key"""
+        with connect(self.path) as conn:
+            row = conn.execute(
+                "SELECT job_id, state, endpoint, lane, stage, percent, progress, code, response, created_at, updated_at "
+                "FROM jobs WHERE job_id = ?" + (" AND api_key = ?" if client is not None else ""),
+                (job_id,) + ((client,) if client is not None else ())
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            "job_id": row[0],
+            "state": row[1],
+            "endpoint": row[2],
+            "lane": row[3],
+            "stage": row[4],
+            "percent": row[5],
+            "progress": json.loads(row[6]) if row[6] else {},
+            "code": row[7],
+            "response": fast_json.loads(row[8]) if row[8] else None,
+            "created_at": row[9],
+            "updated_at": row[10]
+        }
+
+    def hand_off(self, job_ids):
+        """🤝 Release queued jobs of this process so another worker claims them"""
+        if not job_ids:
+            return
+        now = time.time()
+        placeholders = ", ".join("?" for _ in job_ids)
+        with transaction(self.path) as conn:
+            handed_off = [row[0] for row in conn.execute(
+                f"SELECT job_id FROM jobs WHERE state = ? AND owner = ? AND job_id IN ({placeholders})",
+                (QUEUED, self.owner) + tuple(job_ids)
+            ).fetchall()]
+            conn.executemany("UPDATE jobs SET owner = ?, updated_at = ? WHERE job_id = ?", [(HANDOFF_OWNER, now, job_id) for job_id in handed_off])
+            for job_id in handed_off:
+                self._log_event(conn, job_id, 'handed_off', now)
+
+    def claim_handoffs(self, limit):
+        """🤝 Take over up to limit queued jobs released by draining workers and return them for this process's queue"""
+        now = time.time()
+        with transaction(self.path) as conn:
+            rows = conn.execute(
+                "SELECT job_id, job FROM jobs WHERE state = ? AND owner = ? ORDER BY created_at LIMIT ?",
+                (QUEUED, HANDOFF_OWNER, limit)
+            ).fetchall()
+            for job_id, _ in rows:
+                conn.execute("UPDATE jobs SET owner = ?, updated_at = ? WHERE job_id = ?", (self.owner, now, job_id))
+                self._log_event(conn, job_id, 'claimed', now)
+        return [json.loads(job) for _, job in rows]
+
+    def request_drain(self):
+        """🚪 Ask every worker already running to drain; workers started afterwards keep serving. Returns the request time"""
+        now = time.time()
+        with connect(self.path) as conn:
+            conn.execute("INSERT INTO drain_requests (id, requested_at) VALUES (1, ?) ON CONFLICT(id) DO UPDATE SET requested_at = excluded.requested_at", (now,))
+        return now
+
+    def cancel_drain(self):
+        """▶️ Withdraw the drain request, returning whether there was one"""
+        with connect(self.path) as conn:
+            return conn.execute("DELETE FROM drain_requests").rowcount > 0
+
+    def drain_requested_at(self):
+        """🔍 Time of the pending drain request, or None"""
+        with connect(self.path) as conn:
+            row = conn.execute("SELECT requested_at FROM drain_requests").fetchone()
+        return row[0] if row else None
+
+    def claim_orphans(self, waiting_ids=()):
+        """
+        ♻️ Take over unfinished jobs whose owner process is gone, or that a draining worker handed off.
+        Returns (jobs to replay, jobs whose owner died while cancelling them); the caller journals the response of the latter.
+        Queued jobs listed in waiting_ids still wait in a shared broker, or a live consumer just claimed them, and are left to it.
+        """
+        now = time.time()
+        with transaction(self.path) as conn:
+            rows = conn.execute(
+                "SELECT job_id, state, owner, job, cancel_requested FROM jobs WHERE state IN (?, ?) ORDER BY created_at",
+                UNFINISHED_STATES
+            ).fetchall()
+            orphans = [
+                (job_id, json.loads(job), cancelled) for job_id, state, owner, job, cancelled in rows
+                if owner != self.owner and not (state == QUEUED and job_id in waiting_ids) and not owner_alive(owner)
+            ]
+            for job_id, _, cancelled in orphans:
+                if cancelled:
+                    # 🛑 The owner died while stopping this job: finish the cancellation instead of running it again
+                    conn.execute("UPDATE jobs SET state = ?, owner = ?, updated_at = ? WHERE job_id = ?", (CANCELLED, self.owner, now, job_id))
+                    continue
+                conn.execute("UPDATE jobs SET state = ?, owner = ?, updated_at = ? WHERE job_id = ?", (QUEUED, self.owner, now, job_id))
+                self._log_event(conn, job_id, 'replayed', now)
+        return [job for _, job, cancelled in orphans if not cancelled], [job for _, job, cancelled in orphans if cancelled]
+
+    def prune(self, max_age):
+        """🧹 Forget finished jobs older than max_age seconds"""
+        cutoff = time.time() - max_age
+        with transaction(self.path) as conn:
+            conn.execute("DELETE FROM batches WHERE finished_at < ?", (cutoff,))
+            for table in ("job_events", "job_subscribers"):
+                conn.execute(
+                    f"DELETE FROM {table} WHERE job_id IN (SELECT job_id FROM jobs WHERE state IN (?, ?, ?) AND updated_at < ?)",
+                    FINISHED_STATES + (cutoff,)
+                )
+            conn.execute("DELETE FROM jobs WHERE state IN (?, ?, ?) AND updated_at < ?", FINISHED_STATES + (cutoff,))
@@ -0,0 +1,155 @@
+import os
+import logging
+import threading
+import psutil
+from services.sqlite_db import prepare_database, connect, transaction
+
+logger = logging.getLogger(__name__)
+
+# 📈 Counters and histograms shared by every gunicorn worker, so any worker can answer a scrape
+METRICS_PATH = os.environ.get('METRICS_PATH', '/tmp/ciberfobia-api/metrics.db')
+
+PREFIX = "ciberfobia_"
+
+# 🪣 Histogram bucket upper bounds
+SECONDS_BUCKETS = (0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800, 3600)
+THROUGHPUT_BUCKETS = tuple(2 ** exponent for exponent in range(16, 31, 2))  # 📶 64 KiB/s to 1 GiB/s
+SPEED_BUCKETS = (0.25, 0.5, 1, 2, 4, 8, 16, 32, 64)
+
+# 📋 name: (type, help, histogram buckets)
+METRICS = {
+    "jobs_total": ("counter", "Finished jobs by endpoint and response code", None),
+    "job_run_seconds": ("histogram", "Run time of finished jobs by endpoint", SECONDS_BUCKETS),
+    "job_queue_seconds": ("histogram", "Time finished jobs waited in their lane queue", SECONDS_BUCKETS),
+    "job_stage_seconds": ("histogram", "Time finished jobs spent in each stage (download, transcribe, render, upload...)", SECONDS_BUCKETS),
+    "transfer_bytes_total": ("counter", "Bytes downloaded from inputs and uploaded to storage", None),
+    "transfer_seconds_total": ("counter", "Seconds spent downloading inputs and uploading outputs", None),
+    "transfer_throughput_bytes_per_second": ("histogram", "Throughput of each download and upload", THROUGHPUT_BUCKETS),
+    "whisper_model_load_seconds": ("histogram", "Time to load a Whisper model", SECONDS_BUCKETS),
+    "ffmpeg_speed_ratio": ("histogram", "Seconds of media encoded per wall-clock second by each FFmpeg run", SPEED_BUCKETS),
+}
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _labels(labels):
+    return ",".join(f'{key}="{_escape(value)}"' for key, value in sorted(labels.items()))
+
+def _format_value(value):
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+def _sample(name, labels, value):
+    return f"{name}{{{labels}}} {_format_value(value)}" if labels else f"{name} {_format_value(value)}"
+
+def _format_bound(bound):
+    return "+Inf" if bound == float('inf') else _format_value(bound)
+
+class MetricsStore:
+    """📈 Prometheus counters and histograms persisted in SQLite"""
+
+    def __init__(self, path):
+        self.path = path
+        prepare_database(path, [
+            """
+            CREATE TABLE IF NOT EXISTS metric_samples (
+                sample TEXT NOT NULL,
+                labels TEXT NOT NULL,
+                bound REAL NOT NULL DEFAULT 0,
+                value REAL NOT NULL,
+                PRIMARY KEY (sample, labels)
+            )
+            """
+        ])
+
+    def _add(self, conn, sample, labels, value, bound=0):
+        conn.execute(
+            "INSERT INTO metric_samples (sample, labels, bound, value) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(sample, labels) DO UPDATE SET value = value + excluded.value",
+            (sample, labels, bound, value)
+        )
+
+    def inc(self, name, labels, value=1):
+        """➕ Add value to a counter"""
+        with connect(self.path) as conn:
+            self._add(conn, PREFIX + name, _labels(labels), value)
+
+    def observe(self, name, labels, value):
+        """📏 Record one observation in a histogram; every bucket is written so none is missing from the output"""
+        name = PREFIX + name
+        with transaction(self.path) as conn:
+            for bound in METRICS[name[len(PREFIX):]][2] + (float('inf'),):
+                bucket_labels = ",".join(filter(None, (_labels(labels), f'le="{_format_bound(bound)}"')))  # 🔢 le always last
+                self._add(conn, f"{name}_bucket", bucket_labels, 1 if value <= bound else 0, bound)
+            self._add(conn, f"{name}_sum", _labels(labels), value)
+            self._add(conn, f"{name}_count", _labels(labels), 1)
+
+    def render(self, gauges=()):
+        """📄 Every metric in the Prometheus text format; gauges are (name, help, [(labels, value)]) computed by the caller"""
+        with connect(self.path) as conn:
+            rows = conn.execute("SELECT sample, labels, bound, value FROM metric_samples").fetchall()
+        samples = {}
+        for sample, labels, bound, value in rows:
+            samples.setdefault(sample, []).append((labels, bound, value))
+
+        lines = []
+        for name, (kind, help_text, _) in METRICS.items():
+            lines += [f"# HELP {PREFIX}{name} {help_text}", f"# TYPE {PREFIX}{name} {kind}"]
+            suffixes = ("_bucket", "_sum", "_count") if kind == "histogram" else ("",)
+            for suffix in suffixes:
+                # 🔢 Buckets of the same series stay together and in increasing order
+                ordered = sorted(samples.get(f"{PREFIX}{name}{suffix}", []), key=lambda row: (row[0][:row[0].rfind('le=')] if suffix == "_bucket" else row[0], row[1]))
+                lines += [_sample(f"{PREFIX}{name}{suffix}", labels, value) for labels, _, value in ordered]
+        for name, help_text, values in gauges:
+            lines += [f"# HELP {PREFIX}{name} {help_text}", f"# TYPE {PREFIX}{name} gauge"]
+            lines += [_sample(f"{PREFIX}{name}", _labels(labels), value) for labels, value in values]
+        return "\n".join(lines) + "\n"
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_metrics():
+    """🔍 MetricsStore of this process"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = MetricsStore(METRICS_PATH)
+        return _store
+
+def _record(method, *args):
+    # 🛡️ Metrics must never fail the job that reports them
+    try:
+        getattr(get_metrics(), method)(*args)
+    except Exception:
+        logger.exception("Failed to record metrics")
+
+def record_job(endpoint, lane, code, run_time, queue_time, stages=None):
+    """📊 Count a finished job and observe its run, queue and per-stage times"""
+    _record("inc", "jobs_total", {"endpoint": endpoint, "code": code})
+    _record("observe", "job_run_seconds", {"endpoint": endpoint}, run_time)
+    _record("observe", "job_queue_seconds", {"lane": lane}, queue_time)
+    for stage, seconds in (stages or {}).items():
+        _record("observe", "job_stage_seconds", {"endpoint": endpoint, "stage": stage}, seconds)
+
+def record_transfer(direction, num_bytes, seconds):
+    """📶 Count the bytes and time of a download or upload ('download'/'upload') and observe its throughput"""
+    _record("inc", "transfer_bytes_total", {"direction": direction}, num_bytes)
+    _record("inc", "transfer_seconds_total", {"direction": direction}, seconds)
+    if seconds > 0 and num_bytes > 0:
+        _record("observe", "transfer_throughput_bytes_per_second", {"direction": direction}, num_bytes / seconds)
+
+def record_whisper_load(model, seconds):
+    """🧠 Observe the time taken to load a Whisper model"""
+    _record("observe", "whisper_model_load_seconds", {"model": model}, seconds)
+
+def record_ffmpeg_speed(stage, media_seconds, seconds):
+    """🎬 Observe how many seconds of media an FFmpeg run encoded per second"""
+    if media_seconds and seconds > 0:
+        _record("observe", "ffmpeg_speed_ratio", {"stage": stage}, media_seconds / seconds)
+
+def host_gauges():
+    """🖥️ Memory, disk and load of the host, read at scrape time"""
+    return [
+        ("memory_available_bytes", "Memory available to new jobs", [({}, psutil.virtual_memory().available)]),
+        ("tmp_disk_free_bytes", "Free space in /tmp, where jobs keep their files", [({}, psutil.disk_usage('/tmp/').free)]),
+        ("load_average_1m", "One-minute load average of the host", [({}, os.getloadavg()[0])]),
+    ]
@@ -0,0 +1,134 @@
+import os
+import re
+import shutil
+import logging
+from services.job_context import job_context, current_job, report_progress, check_cancelled
+
+logger = logging.getLogger(__name__)
+
+STORAGE_PATH = "/tmp/"
+
+# 🔗 A payload value of exactly "{{step_id}}" or "{{step_id.field.subfield}}" is replaced by that step's output
+PLACEHOLDER = re.compile(r'^\{\{\s*([A-Za-z0-9_-]+)((?:\.[A-Za-z0-9_-]+)*)\s*\}\}$')
+VALIDATION_URL = "https://pipeline.invalid/{}"  # 🧪 Stand-in for step outputs while validating payloads up front
+
+class PipelineError(ValueError):
+    """🚫 The steps of a pipeline do not form a valid DAG"""
+
+class PipelineStepFailed(Exception):
+    """💥 A pipeline step returned an error"""
+
+    def __init__(self, step_id, response, code):
+        super().__init__(f"Step '{step_id}' failed with code {code}")
+        self.step_id = step_id
+        self.response = response
+        self.code = code
+
+def _placeholders(value):
+    """🔍 (step_id, field path) of every placeholder in a payload, at any depth"""
+    if isinstance(value, str):
+        match = PLACEHOLDER.match(value)
+        if match:
+            yield match.group(1), [field for field in match.group(2).split('.') if field]
+    elif isinstance(value, dict):
+        for item in value.values():
+            yield from _placeholders(item)
+    elif isinstance(value, list):
+        for item in value:
+            yield from _placeholders(item)
+
+def _substitute(value, resolve):
+    if isinstance(value, str):
+        match = PLACEHOLDER.match(value)
+        if match:
+            return resolve(match.group(1), [field for field in match.group(2).split('.') if field])
+        return value
+    if isinstance(value, dict):
+        return {key: _substitute(item, resolve) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_substitute(item, resolve) for item in value]
+    return value
+
+def step_dependencies(step):
+    """🔗 Ids of the steps whose output a step consumes"""
+    return {step_id for step_id, _ in _placeholders(step["payload"])}
+
+def plan_pipeline(steps):
+    """📋 Order the steps so every step runs after the steps it depends on; raise PipelineError on a bad DAG"""
+    by_id = {}
+    for step in steps:
+        if step["id"] in by_id:
+            raise PipelineError(f"Duplicate step id '{step['id']}'")
+        by_id[step["id"]] = step
+
+    dependencies = {}
+    for step in steps:
+        unknown = step_dependencies(step) - by_id.keys()
+        if unknown:
+            raise PipelineError(f"Step '{step['id']}' references unknown steps: {', '.join(sorted(unknown))}")
+        dependencies[step["id"]] = step_dependencies(step)
+
+    # 🔀 Kahn's algorithm, keeping the submitted order among steps that are ready together
+    ordered, done = [], set()
+    while len(ordered) < len(steps):
+        ready = [step for step in steps if step["id"] not in done and dependencies[step["id"]] <= done]
+        if not ready:
+            raise PipelineError("Steps contain a dependency cycle")
+        for step in ready:
+            ordered.append(step)
+            done.add(step["id"])
+    return ordered
+
+def final_step_ids(steps):
+    """🏁 Steps no other step consumes: only their outputs are uploaded"""
+    consumed = set()
+    for step in steps:
+        consumed |= step_dependencies(step)
+    return [step["id"] for step in steps if step["id"] not in consumed]
+
+def validation_payload(step):
+    """🧪 Payload of a step with placeholders replaced by URLs, so it can be checked against the endpoint schema"""
+    return _substitute(step["payload"], lambda step_id, fields: VALIDATION_URL.format(step_id))
+
+def run_pipeline(job_id, steps, run_step):
+    """
+    🔄 Run the steps of a pipeline in dependency order inside the current job.
+    Intermediate outputs stay in a local directory and are passed to later steps as file:// URLs;
+    only the outputs of final steps are uploaded. Returns {final_step_id: output}.
+    """
+    job = current_job()
+    if job is None:
+        # ⚡ Synchronous request: bind a context so steps still hand their outputs over locally
+        with job_context(job_id):
+            return run_pipeline(job_id, steps, run_step)
+
+    ordered = plan_pipeline(steps)
+    finals = set(final_step_ids(steps))
+    outputs = {}
+
+    def resolve(step_id, fields):
+        value = outputs[step_id]
+        for field in fields:
+            value = value[field]
+        return value
+
+    pipeline_dir = os.path.join(STORAGE_PATH, f"{job_id}_pipeline")
+    os.makedirs(pipeline_dir, exist_ok=True)
+    job.pipeline_dir = pipeline_dir
+    try:
+        for index, step in enumerate(ordered):
+            check_cancelled()
+            report_progress(stage='pipeline', percent=index / len(ordered) * 100, step=step["id"])
+            job.keep_outputs_local = step["id"] not in finals  # 📁 Intermediate outputs skip the upload
+            logger.info(f"Job {job_id}: Running pipeline step '{step['id']}' ({step['endpoint']})")
+            response, _, code = run_step(f"{job_id}_{step['id']}", step, _substitute(step["payload"], resolve))
+            if code != 200:
+                raise PipelineStepFailed(step["id"], response, code)
+            outputs[step["id"]] = response
+    finally:
+        job.keep_outputs_local = False
+        job.pipeline_dir = None
+        shutil.rmtree(pipeline_dir, ignore_errors=True)
+
+    report_progress(stage='pipeline', percent=100)
+    return {step_id: outputs[step_id] for step_id in outputs if step_id in finals}
@@ -0,0 +1,160 @@
+import os
+import queue
+import logging
+import threading
+import multiprocessing
+from contextlib import nullcontext
+from services.job_context import job_context, cancel_running_job
+from services.time_limits import process_cpu_seconds
+
+logger = logging.getLogger(__name__)
+
+# 🧮 Processes per gunicorn worker that run jobs outside of its GIL; 0 runs every job in the consumer thread
+PROCESS_POOL_WORKERS = int(os.environ.get('PROCESS_POOL_WORKERS', 0))
+# 🛣️ Lanes whose jobs go to the pool; io jobs mostly wait on the network and gain nothing from it
+PROCESS_POOL_LANES = tuple(lane.strip() for lane in os.environ.get('PROCESS_POOL_LANES', 'heavy').split(',') if lane.strip())
+# 🚀 'forkserver' or 'spawn': forking a worker that already runs threads is not safe
+PROCESS_POOL_START_METHOD = os.environ.get('PROCESS_POOL_START_METHOD', 'forkserver')
+
+POLL_INTERVAL = 0.5  # ⏱️ Seconds between checks for cancellation and CPU time while a pool process runs a job
+
+class PoolProcessDied(Exception):
+    """💥 A pool process exited while running a job"""
+
+def _serve(conn, preload_model):
+    """
+    🧮 Main loop of a pool process: run the jobs sent by the parent one at a time and send back
+    their progress and outcome. Loaded Whisper models stay in memory for the next jobs.
+    """
+    from flask import Flask
+    from blueprints import register_blueprints
+    from app_utils import TASK_REGISTRY
+    from services.profiling import profiled
+    from services.whisper_toolkit import keep_loaded_models, load_model
+
+    # 📥 Same routes as the worker, so tasks such as pipelines can look each other up
+    app = Flask('app')
+    register_blueprints(app)
+    keep_loaded_models()
+    if preload_model:
+        load_model(preload_model)
+
+    send_lock = threading.Lock()
+
+    def send(message):
+        with send_lock:
+            conn.send(message)
+
+    # 📨 Messages are read in the background, so a cancellation arrives while a job runs
+    jobs = queue.Queue()
+    cancelled_ids = set()  # 🛑 Also catches a cancellation read before its job started
+
+    def read_messages():
+        while True:
+            try:
+                kind, payload = conn.recv()
+            except (EOFError, OSError):
+                os._exit(0)  # 🚪 The gunicorn worker is gone
+            if kind == 'run':
+                jobs.put(payload)
+            elif kind == 'cancel':
+                cancelled_ids.add(payload)
+                cancel_running_job(payload)
+
+    threading.Thread(target=read_messages, name="pool-messages", daemon=True).start()
+
+    while True:
+        job = jobs.get()
+        job_id, endpoint = job["job_id"], job["endpoint"]
+        profile = {"path": None}
+        task_func = TASK_REGISTRY.get(job["task_key"])
+        on_progress = lambda _, stage, percent, details: send(('progress', (stage, percent, details)))
+        with app.app_context(), job_context(job_id, on_progress=on_progress) as context:
+            context.profiling = job.get("profile", False)
+            context.measure_media = job.get("media_duration") is None
+            if job_id in cancelled_ids:
+                context.cancel()
+            with profiled(job_id) if context.profiling else nullcontext(profile) as profile:
+                try:
+                    response = task_func(job_id=job_id, data=job["data"], **job["kwargs"])
+                except Exception as e:
+                    if not context.cancelled.is_set():
+                        logger.exception(f"Job {job_id}: Unhandled error in {endpoint}")
+                    response = (str(e), endpoint, 500)
+        cancelled_ids.discard(job_id)
+        send(('done', (tuple(response), context.stage_times(), sorted(context.files), profile["path"], context.media_duration)))
+
+class ProcessPool:
+    """🧮 Fixed set of long-lived processes that run jobs outside of the gunicorn worker's GIL"""
+
+    def __init__(self, size, start_method=PROCESS_POOL_START_METHOD, preload_model=None):
+        if start_method not in ('forkserver', 'spawn'):
+            raise ValueError(f"Unknown PROCESS_POOL_START_METHOD '{start_method}'. Use 'forkserver' or 'spawn'")
+        self.mp_context = multiprocessing.get_context(start_method)
+        self.preload_model = preload_model
+        self.idle = queue.Queue()
+        for _ in range(size):
+            self.idle.put(self._start())
+        logger.info(f"Job process pool started with {size} {start_method} processes")
+
+    def _start(self):
+        parent_conn, child_conn = self.mp_context.Pipe()
+        process = self.mp_context.Process(target=_serve, args=(child_conn, self.preload_model), name="job-pool", daemon=True)
+        process.start()
+        child_conn.close()
+        return process, parent_conn
+
+    def run(self, job, context):
+        """
+        🔄 Run a job in a free pool process, waiting for one if all are busy. Progress, stage times and temporary
+        files are copied into context; cancelling context (or the watchdog timing it out) cancels the job there.
+        Returns (response, {"path": profile path or None}).
+        """
+        process, conn = self.idle.get()
+        if not process.is_alive():
+            logger.warning(f"Pool process {process.pid} exited while idle (exit code {process.exitcode}), starting a new one")
+            conn.close()
+            process, conn = self._start()
+        try:
+            return self._run(process, conn, job, context)
+        except PoolProcessDied:
+            logger.error(f"Job {job['job_id']}: Pool process {process.pid} died (exit code {process.exitcode}), starting a new one")
+            conn.close()
+            process, conn = self._start()
+            return ("Job process died while running the job", job["endpoint"], 500), {"path": None}
+        finally:
+            self.idle.put((process, conn))
+
+    def _run(self, process, conn, job, context):
+        try:
+            conn.send(('run', job))
+        except (BrokenPipeError, OSError):
+            raise PoolProcessDied()
+        cpu_at_start = process_cpu_seconds(process.pid) or 0
+        cancel_sent = False
+        while True:
+            try:
+                if context.cancelled.is_set() and not cancel_sent:
+                    conn.send(('cancel', job["job_id"]))
+                    cancel_sent = True
+                if not conn.poll(POLL_INTERVAL):
+                    if not process.is_alive():
+                        raise PoolProcessDied()
+                    # 🧮 CPU used by the pool process and its FFmpeg children, for the CPU time limit
+                    cpu = process_cpu_seconds(process.pid)
+                    if cpu is not None:
+                        context.child_cpu[process.pid] = cpu - cpu_at_start
+                    continue
+                kind, payload = conn.recv()
+            except (EOFError, OSError):
+                raise PoolProcessDied()
+            if kind == 'progress':
+                stage, percent, details = payload
+                context.report(stage, percent, **details)
+            elif kind == 'done':
+                response, stages, files, profile_path, media_duration = payload
+                for stage, seconds in stages.items():
+                    context.add_stage_time(stage, seconds)
+                context.files.update(files)
+                context.media_duration = media_duration
+                return response, {"path": profile_path}
@@ -0,0 +1,54 @@
+import os
+import cProfile
+import logging
+import threading
+from contextlib import contextmanager
+from services.cloud_storage import upload_file
+
+logger = logging.getLogger(__name__)
+
+STORAGE_PATH = "/tmp/"
+PROFILE_HEADER = 'X-Profile'  # 🔬 Request header that asks for a profile of the job
+
+_profiler_lock = threading.Lock()  # 🔒 Newer Pythons allow a single active cProfile per process
+
+def profile_requested(headers):
+    """🔍 Whether a request asked for its job to be profiled"""
+    return headers.get(PROFILE_HEADER, '').lower() in ('1', 'true', 'yes')
+
+@contextmanager
+def profiled(job_id):
+    """
+    🔬 Run the block under cProfile. The yielded dict gets the 'path' of the .prof file once the block ends,
+    or keeps None when another job of this process is already being profiled.
+    """
+    profile = {"path": None}
+    if not _profiler_lock.acquire(blocking=False):
+        logger.warning(f"Job {job_id}: Another job is being profiled, running without profiler")
+        yield profile
+        return
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+        try:
+            yield profile
+        finally:
+            profiler.disable()
+            path = os.path.join(STORAGE_PATH, f"{job_id}.prof")
+            profiler.dump_stats(path)
+            profile["path"] = path
+    finally:
+        _profiler_lock.release()
+
+def upload_profile(path):
+    """📤 Upload a .prof file next to the job outputs and return its URL, or None if the upload fails"""
+    if path is None:
+        return None
+    try:
+        return upload_file(path)
+    except Exception:
+        logger.exception(f"Failed to upload profile {path}")
+        return None
+    finally:
+        if os.path.exists(path):
+            os.remove(path)
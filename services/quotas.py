@@ -0,0 +1,85 @@
+import math
+import time
+import logging
+from config import API_KEYS
+from services.sqlite_db import prepare_database, transaction
+from services.admission import AdmissionDenied
+
+logger = logging.getLogger(__name__)
+
+def lookup_api_key(api_key):
+    """🔑 Policy of an API key ({"name", "rate_per_minute", "burst", "max_running", "max_queued"}), or None if unknown"""
+    if not api_key:
+        return None
+    return API_KEYS.get(api_key)
+
+def policy_for(name):
+    """🔍 Policy of the API key journaled under this name; empty (no quotas) for jobs without one"""
+    for policy in API_KEYS.values():
+        if policy["name"] == name:
+            return policy
+    return {}
+
+class RateLimiter:
+    """🪣 One token bucket per API key, shared by every gunicorn worker through SQLite"""
+
+    def __init__(self, path):
+        self.path = path
+        prepare_database(path, [
+            """
+            CREATE TABLE IF NOT EXISTS rate_buckets (
+                api_key TEXT PRIMARY KEY,
+                tokens REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+            """
+        ])
+
+    def consume(self, name, rate_per_minute, burst=None):
+        """
+        🪙 Take one token from a key's bucket, refilled at rate_per_minute up to burst tokens.
+        Returns (allowed, tokens left, seconds until the next token when refused).
+        """
+        capacity = burst or rate_per_minute
+        rate = rate_per_minute / 60
+        now = time.time()
+        with transaction(self.path) as conn:
+            row = conn.execute("SELECT tokens, updated_at FROM rate_buckets WHERE api_key = ?", (name,)).fetchone()
+            tokens = capacity if row is None else min(capacity, row[0] + (now - row[1]) * rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            conn.execute(
+                "INSERT INTO rate_buckets (api_key, tokens, updated_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(api_key) DO UPDATE SET tokens = excluded.tokens, updated_at = excluded.updated_at",
+                (name, tokens, now)
+            )
+        return allowed, tokens, 0 if allowed else max(math.ceil((1 - tokens) / rate), 1)
+
+def check_rate(rate_limiter, policy):
+    """🔍 Raise AdmissionDenied (429) if the key ran out of requests; returns the tokens left, or None without a rate"""
+    rate_per_minute = policy.get("rate_per_minute")
+    if not rate_per_minute:
+        return None
+    allowed, tokens, wait = rate_limiter.consume(policy["name"], rate_per_minute, policy.get("burst"))
+    if not allowed:
+        raise AdmissionDenied(429, f"Rate limit of API key '{policy['name']}' ({rate_per_minute}/min) exceeded", wait)
+    return tokens
+
+def check_queued_quota(policy, queued_jobs, new_jobs, retry_after):
+    """🔍 Raise AdmissionDenied (429) if new_jobs more queued jobs would exceed the key's max_queued"""
+    limit = policy.get("max_queued")
+    if limit is not None and queued_jobs + new_jobs > limit:
+        raise AdmissionDenied(429, f"Queued job quota of API key '{policy['name']}' ({limit}) reached", retry_after)
+
+def quota_headers(policy, tokens, usage):
+    """📨 Response headers telling a client how much of its quota is left"""
+    headers = {}
+    if policy.get("rate_per_minute"):
+        headers["X-RateLimit-Limit"] = str(policy["rate_per_minute"])
+        headers["X-RateLimit-Remaining"] = str(math.floor(tokens or 0))
+    for name, limit, used in (("Queued", policy.get("max_queued"), usage["queued"]), ("Running", policy.get("max_running"), usage["running"])):
+        if limit is not None:
+            headers[f"X-Quota-{name}-Limit"] = str(limit)
+            headers[f"X-Quota-{name}-Remaining"] = str(max(limit - used, 0))
+    return headers
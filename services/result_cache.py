@@ -0,0 +1,145 @@
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+import requests
+from services.sqlite_db import prepare_database, connect, transaction
+from services import fast_json
+from services.file_management import find_input_urls
+from version import BUILD_NUMBER
+
+logger = logging.getLogger(__name__)
+
+# 🗃️ Cache of uploaded outputs of deterministic endpoints, shared by every gunicorn worker
+RESULT_CACHE_PATH = os.environ.get('RESULT_CACHE_PATH', '/tmp/ciberfobia-api/results.db')
+RESULT_CACHE_TTL_HOURS = float(os.environ.get('RESULT_CACHE_TTL_HOURS', 24))  # ⏳ 0 disables the cache
+RESULT_CACHE_MAX_ENTRIES = int(os.environ.get('RESULT_CACHE_MAX_ENTRIES', 10000))  # 🧹 Least recently used entries are evicted above this
+
+HEAD_TIMEOUT = 10  # ⏱️ Seconds to wait for the HEAD request that fingerprints an input
+
+def fingerprint_url(url):
+    """🏷️ Identify the bytes behind a URL by its ETag, or Content-Length + Last-Modified; None if the server gives neither"""
+    try:
+        response = requests.head(url, allow_redirects=True, timeout=HEAD_TIMEOUT)
+        response.raise_for_status()
+    except requests.RequestException as e:
+        logger.info(f"Result cache: cannot fingerprint {url}: {e}")
+        return None
+    etag = response.headers.get('ETag')
+    if etag:
+        return f"etag:{etag}"
+    length, modified = response.headers.get('Content-Length'), response.headers.get('Last-Modified')
+    if length and modified:
+        return f"length:{length};modified:{modified}"
+    return None
+
+class ResultCache:
+    """🗃️ Content-addressed cache: input fingerprints + canonical parameters + build number -> previous response"""
+
+    def __init__(self, path, ttl, max_entries):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        prepare_database(path, [
+            """
+            CREATE TABLE IF NOT EXISTS results (
+                cache_key TEXT PRIMARY KEY,
+                task TEXT NOT NULL,
+                response TEXT NOT NULL,
+                endpoint TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_used_at REAL NOT NULL,
+                hits INTEGER NOT NULL DEFAULT 0
+            )
+            """,
+            "CREATE INDEX IF NOT EXISTS results_last_used ON results (last_used_at)",
+            """
+            CREATE TABLE IF NOT EXISTS result_stats (
+                task TEXT PRIMARY KEY,
+                hits INTEGER NOT NULL DEFAULT 0,
+                misses INTEGER NOT NULL DEFAULT 0
+            )
+            """
+        ])
+        logger.info(f"Result cache ready at {path}")
+
+    def key_for(self, task, data, ignored_fields=()):
+        """🔑 Cache key of a job, leaving out the fields that do not change its output, or None when an input cannot be fingerprinted without downloading it"""
+        inputs = {}
+        for url in sorted(find_input_urls(data, ignored_fields)):
+            fingerprint = fingerprint_url(url)
+            if fingerprint is None:
+                return None
+            inputs[url] = fingerprint
+        material = {
+            "task": task,
+            "params": {k: v for k, v in data.items() if k not in ignored_fields},
+            "inputs": inputs,
+            "build_number": BUILD_NUMBER
+        }
+        return hashlib.sha256(json.dumps(material, sort_keys=True, separators=(",", ":")).encode()).hexdigest()
+
+    def _count(self, conn, task, column):
+        conn.execute(f"INSERT INTO result_stats (task, {column}) VALUES (?, 1) ON CONFLICT(task) DO UPDATE SET {column} = {column} + 1", (task,))
+
+    def get(self, task, key):
+        """📤 Previous (response, endpoint) for this key, or None; expired entries count as misses"""
+        now = time.time()
+        with transaction(self.path) as conn:
+            row = conn.execute("SELECT response, endpoint, created_at FROM results WHERE cache_key = ?", (key,)).fetchone()
+            if row is not None and row[2] < now - self.ttl:
+                conn.execute("DELETE FROM results WHERE cache_key = ?", (key,))
+                row = None
+            if row is None:
+                self._count(conn, task, "misses")
+                return None
+            conn.execute("UPDATE results SET last_used_at = ?, hits = hits + 1 WHERE cache_key = ?", (now, key))
+            self._count(conn, task, "hits")
+        return fast_json.loads(row[0]), row[1]
+
+    def put(self, task, key, response, endpoint):
+        """📥 Store a successful response, then drop expired and least recently used entries"""
+        now = time.time()
+        with transaction(self.path) as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO results (cache_key, task, response, endpoint, created_at, last_used_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (key, task, fast_json.dumps(response), endpoint, now, now)
+            )
+            conn.execute("DELETE FROM results WHERE created_at < ?", (now - self.ttl,))
+            conn.execute(
+                "DELETE FROM results WHERE cache_key IN (SELECT cache_key FROM results ORDER BY last_used_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+
+    def stats(self):
+        """📊 Entries, hits, misses and hit ratio per task and overall"""
+        with connect(self.path) as conn:
+            entries = dict(conn.execute("SELECT task, COUNT(*) FROM results GROUP BY task").fetchall())
+            counters = conn.execute("SELECT task, hits, misses FROM result_stats").fetchall()
+        tasks = {}
+        for task, hits, misses in counters:
+            tasks[task] = {"entries": entries.get(task, 0), "hits": hits, "misses": misses, "hit_ratio": round(hits / (hits + misses), 4) if hits + misses else None}
+        hits = sum(stat["hits"] for stat in tasks.values())
+        misses = sum(stat["misses"] for stat in tasks.values())
+        return {
+            "entries": sum(entries.values()),
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": round(hits / (hits + misses), 4) if hits + misses else None,
+            "tasks": tasks
+        }
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_result_cache():
+    """🔍 Shared ResultCache of this process, or None when RESULT_CACHE_TTL_HOURS is 0"""
+    global _cache
+    if RESULT_CACHE_TTL_HOURS <= 0:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResultCache(RESULT_CACHE_PATH, RESULT_CACHE_TTL_HOURS * 3600, RESULT_CACHE_MAX_ENTRIES)
+        return _cache
@@ -1,5 +1,4 @@
 import os
-import boto3
 import logging
 from urllib.parse import urlparse
 
@@ -23,7 +22,8 @@ def parse_s3_url(s3_url):
 def upload_to_s3(file_path, s3_url, access_key, secret_key):
     # Parse the S3 URL into bucket, region, and endpoint
     bucket_name, region, endpoint_url = parse_s3_url(s3_url)
-    
+
+    import boto3  # Imported on first upload so workers that never use S3 start faster
     session = boto3.Session(
         aws_access_key_id=access_key,
         aws_secret_access_key=secret_key,
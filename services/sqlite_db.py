@@ -0,0 +1,41 @@
+import os
+import sqlite3
+from contextlib import contextmanager
+
+def prepare_database(path, schema):
+    """🗄️ Create the database directory, switch it to WAL mode and apply the schema statements"""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with connect(path) as conn:
+        conn.execute("PRAGMA journal_mode=WAL")
+        for statement in schema:
+            conn.execute(statement)
+
+def add_missing_columns(path, table, columns):
+    """➕ Add columns introduced after a database file was first created"""
+    with connect(path) as conn:
+        existing = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+        for name, definition in columns.items():
+            if name not in existing:
+                conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} {definition}")
+
+@contextmanager
+def connect(path):
+    """🔌 Short-lived autocommit connection, safe to use from any thread or gunicorn worker"""
+    conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+    try:
+        conn.execute("PRAGMA synchronous=NORMAL")
+        yield conn
+    finally:
+        conn.close()
+
+@contextmanager
+def transaction(path):
+    """🔒 Connection holding a write lock until the block ends; rolled back if the block raises"""
+    with connect(path) as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
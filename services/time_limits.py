@@ -0,0 +1,79 @@
+import os
+import json
+import time
+import logging
+import psutil
+from services.job_context import running_jobs
+
+logger = logging.getLogger(__name__)
+
+# ⏲️ Default limits of every job; 0 disables the limit
+JOB_RUN_TIME_LIMIT = float(os.environ.get('JOB_RUN_TIME_LIMIT', 0))  # 🕐 Wall-clock seconds
+JOB_CPU_TIME_LIMIT = float(os.environ.get('JOB_CPU_TIME_LIMIT', 0))  # 🧮 CPU seconds of the job's thread and child processes
+# 🛣️ Per-endpoint defaults, e.g. {"/v1/video/caption": {"run_time": 7200, "cpu_time": 28800}}
+ENDPOINT_TIME_LIMITS = json.loads(os.environ.get('ENDPOINT_TIME_LIMITS', '{}'))
+
+WATCHDOG_INTERVAL = 1.0  # 🐕 Seconds between two checks of the running jobs
+
+def job_limits(endpoint, data):
+    """⏲️ (run time, CPU time) limits of a job in seconds, None when unlimited; the request can only lower the endpoint defaults"""
+    defaults = ENDPOINT_TIME_LIMITS.get(endpoint, {})
+    limits = []
+    for name, default, requested in (
+        ("run_time", JOB_RUN_TIME_LIMIT, data.get("max_run_time")),
+        ("cpu_time", JOB_CPU_TIME_LIMIT, data.get("max_cpu_time"))
+    ):
+        limit = defaults.get(name, default) or None
+        if requested is not None:
+            limit = min(limit, requested) if limit is not None else requested
+        limits.append(limit)
+    return tuple(limits)
+
+def process_cpu_seconds(pid):
+    """⚙️ CPU seconds of a process and everything it spawned, or None once it is gone"""
+    try:
+        process = psutil.Process(pid)
+        total = sum(process.cpu_times()[:4])  # 🧮 user, system and those of the children it already waited for
+        for child in process.children(recursive=True):
+            try:
+                total += sum(child.cpu_times()[:2])
+            except psutil.Error:
+                pass
+        return total
+    except psutil.Error:
+        return None
+
+def job_cpu_seconds(job, threads):
+    """🧮 CPU seconds used so far by a job: its task thread plus its child processes, finished ones as last sampled"""
+    for process in job.running_processes():
+        seconds = process_cpu_seconds(process.pid)
+        if seconds is not None:
+            job.child_cpu[process.pid] = seconds
+    thread = threads.get(job.thread_id)
+    return (thread.user_time + thread.system_time if thread else 0) + sum(job.child_cpu.values())
+
+def check_time_limits():
+    """🐕 Stop every running job of this process that went over its run time or CPU time limit"""
+    jobs = [job for job in running_jobs() if job.timed_out is None and (job.run_time_limit or job.cpu_time_limit)]
+    if not jobs:
+        return
+    threads = {thread.id: thread for thread in psutil.Process().threads()} if any(job.cpu_time_limit for job in jobs) else {}
+    for job in jobs:
+        run_time = time.monotonic() - job.started
+        if job.run_time_limit and run_time > job.run_time_limit:
+            reason = f"Job exceeded its run time limit of {job.run_time_limit:g}s"
+        elif job.cpu_time_limit and job_cpu_seconds(job, threads) > job.cpu_time_limit:
+            reason = f"Job exceeded its CPU time limit of {job.cpu_time_limit:g}s"
+        else:
+            continue
+        logger.warning(f"Job {job.job_id}: {reason}, stopping it after {run_time:.0f}s")
+        job.time_out(reason)
+
+def watch_time_limits():
+    """🐕 Watchdog loop enforcing the time limits of the jobs running in this process"""
+    while True:
+        time.sleep(WATCHDOG_INTERVAL)
+        try:
+            check_time_limits()
+        except Exception:
+            logger.exception("Time limit watchdog failed to check the running jobs")
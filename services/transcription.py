@@ -1,9 +1,8 @@
 import os
-import whisper
 import srt
 from datetime import timedelta
-from whisper.utils import WriteSRT, WriteVTT
 from services.file_management import download_file
+from services.whisper_toolkit import load_model, transcribe
 import logging
 import uuid
 
@@ -21,19 +20,19 @@ def process_transcription(media_url, output_type, max_chars=56, language=None,):
     logger.info(f"Downloaded media to local file: {input_filename}")
 
     try:
-        model = whisper.load_model("base")
+        model = load_model("base")
         logger.info("Loaded Whisper model")
 
         # result = model.transcribe(input_filename)
         # logger.info("Transcription completed")
 
         if output_type == 'transcript':
-            result = model.transcribe(input_filename, language=language)
+            result = transcribe(model, input_filename, language=language)
             output = result['text']
             logger.info("Generated transcript output")
         elif output_type in ['srt', 'vtt']:
 
-            result = model.transcribe(input_filename)
+            result = transcribe(model, input_filename)
             srt_subtitles = []
             for i, segment in enumerate(result['segments'], start=1):
                 start = timedelta(seconds=segment['start'])
@@ -52,7 +51,8 @@ def process_transcription(media_url, output_type, max_chars=56, language=None,):
             logger.info(f"Generated {output_type.upper()} output: {output}")
 
         elif output_type == 'ass':
-            result = model.transcribe(
+            result = transcribe(
+                model,
                 input_filename,
                 word_timestamps=True,
                 task='transcribe',
@@ -2,6 +2,7 @@ import os
 import subprocess
 import json
 from services.file_management import download_file
+from services.ffmpeg_toolkit import run_ffmpeg, run_process
 
 STORAGE_PATH = "/tmp/"
 
@@ -40,7 +41,7 @@ def get_metadata(filename, metadata_requests, job_id):
             thumbnail_filename
         ]
         try:
-            subprocess.run(thumbnail_command, check=True, capture_output=True, text=True)
+            run_process(thumbnail_command, check=True)
             if os.path.exists(thumbnail_filename):
                 metadata['thumbnail'] = thumbnail_filename  # Return local path instead of URL
         except subprocess.CalledProcessError as e:
@@ -58,7 +59,7 @@ def get_metadata(filename, metadata_requests, job_id):
             '-show_streams',
             filename
         ]
-        result = subprocess.run(ffprobe_command, capture_output=True, text=True)
+        result = run_process(ffprobe_command)
         probe_data = json.loads(result.stdout)
         
         if metadata_requests.get('duration'):
@@ -123,7 +124,7 @@ def process_ffmpeg_compose(data, job_id):
     
     # Execute FFmpeg command
     try:
-        subprocess.run(command, check=True, capture_output=True, text=True)
+        run_ffmpeg(command)
     except subprocess.CalledProcessError as e:
         raise Exception(f"FFmpeg command failed: {e.stderr}")
     
@@ -1,9 +1,8 @@
 import os
-import whisper
 import srt
 from datetime import timedelta
-from whisper.utils import WriteSRT, WriteVTT
 from services.file_management import download_file
+from services.whisper_toolkit import load_model, transcribe
 import logging
 
 # Set up logging
@@ -23,7 +22,7 @@ def process_transcribe_media(media_url, task, include_text, include_srt, include
         # Load a larger model for better translation quality
         #model_size = "large" if task == "translate" else "base"
         model_size = "base"
-        model = whisper.load_model(model_size)
+        model = load_model(model_size)
         logger.info(f"Loaded Whisper {model_size} model")
 
         # Configure transcription/translation options
@@ -37,7 +36,7 @@ def process_transcribe_media(media_url, task, include_text, include_srt, include
         if language:
             options["language"] = language
 
-        result = model.transcribe(input_filename, **options)
+        result = transcribe(model, input_filename, **options)
         
         # For translation task, the result['text'] will be in English
         text = None
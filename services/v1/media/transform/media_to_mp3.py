@@ -2,6 +2,7 @@ import os
 import ffmpeg
 import requests
 from services.file_management import download_file
+from services.ffmpeg_toolkit import run_ffmpeg
 
 # Set the default local storage directory
 STORAGE_PATH = "/tmp/"
@@ -14,12 +15,12 @@ def process_media_to_mp3(media_url, job_id, bitrate='128k', webhook_url=None):
 
     try:
         # Convert media file to MP3 with specified bitrate
-        (
+        run_ffmpeg(
             ffmpeg
             .input(input_filename)
             .output(output_path, acodec='libmp3lame', audio_bitrate=bitrate)
             .overwrite_output()
-            .run(capture_stdout=True, capture_stderr=True)
+            .compile()
         )
         os.remove(input_filename)
         print(f"Conversion successful: {output_path} with bitrate {bitrate}")
@@ -2,11 +2,13 @@ import os
 import ffmpeg
 import logging
 import subprocess
-import whisper
 from datetime import timedelta
 import srt
 import re
-from services.file_management import download_file
+from services.file_management import download_file, pipeline_file_path, TRANSFER_TIMEOUT
+from services.ffmpeg_toolkit import run_ffmpeg
+from services.whisper_toolkit import load_model, transcribe
+from services.job_context import span
 from services.cloud_storage import upload_file  # Ensure this import is present
 import requests  # Ensure requests is imported for webhook handling
 from urllib.parse import urlparse
@@ -47,20 +49,21 @@ def rgb_to_ass_color(rgb_color):
 
 def generate_transcription(video_path, language='auto'):
     try:
-        model = whisper.load_model("base")
+        model = load_model("base")
         transcription_options = {
             'word_timestamps': True,
             'verbose': True,
         }
         if language != 'auto':
             transcription_options['language'] = language
-        result = model.transcribe(video_path, **transcription_options)
+        result = transcribe(model, video_path, **transcription_options)
         logger.info(f"Transcription generated successfully for video: {video_path}")
         return result
     except Exception as e:
         logger.error(f"Error in transcription: {str(e)}")
         raise
 
+@span('probe')
 def get_video_resolution(video_path):
     try:
         probe = ffmpeg.probe(video_path)
@@ -139,18 +142,22 @@ def split_lines(text, max_words_per_line):
     return lines
 
 def is_url(string):
-    """Check if the given string is a valid HTTP/HTTPS URL."""
+    """Check if the given string is a valid HTTP/HTTPS URL, or a file:// URL passed between pipeline steps."""
     try:
         result = urlparse(string)
-        return result.scheme in ('http', 'https')
+        return result.scheme in ('http', 'https', 'file')
     except:
         return False
 
+@span('download')
 def download_captions(captions_url):
     """Download captions from the given URL."""
     try:
         logger.info(f"Downloading captions from URL: {captions_url}")
-        response = requests.get(captions_url)
+        if captions_url.startswith('file://'):
+            with open(pipeline_file_path(captions_url), encoding='utf-8') as captions_file:
+                return captions_file.read()
+        response = requests.get(captions_url, timeout=TRANSFER_TIMEOUT)
         response.raise_for_status()
         logger.info("Captions downloaded successfully.")
         return response.text
@@ -606,6 +613,7 @@ def srt_to_ass(transcription_result, style_type, settings, replace_dict, video_r
     logger.info("Converted transcription result to ASS format.")
     return ass_header + dialogue_lines + "\n"
 
+@span('subtitles')
 def process_subtitle_events(transcription_result, style_type, settings, replace_dict, video_resolution):
     """
     Process transcription results into ASS subtitle format.
@@ -737,14 +745,14 @@ def process_captioning_v1(video_url, captions, settings, replace, job_id, langua
 
         # Process video with subtitles using FFmpeg
         try:
-            ffmpeg.input(video_path).output(
+            run_ffmpeg(ffmpeg.input(video_path).output(
                 output_path,
                 vf=f"subtitles='{subtitle_path}'",
                 acodec='copy'
-            ).run(overwrite_output=True)
+            ).compile(overwrite_output=True))
             logger.info(f"Job {job_id}: FFmpeg processing completed. Output saved to {output_path}")
-        except ffmpeg.Error as e:
-            stderr_output = e.stderr.decode('utf8') if e.stderr else 'Unknown error'
+        except subprocess.CalledProcessError as e:
+            stderr_output = e.stderr or 'Unknown error'
             logger.error(f"Job {job_id}: FFmpeg error: {stderr_output}")
             return {"error": f"FFmpeg error: {stderr_output}"}
 
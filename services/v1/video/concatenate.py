@@ -2,6 +2,7 @@ import os
 import ffmpeg
 import requests
 from services.file_management import download_file
+from services.ffmpeg_toolkit import run_ffmpeg, probe_duration
 
 # Set the default local storage directory
 STORAGE_PATH = "/tmp/"
@@ -27,10 +28,12 @@ def process_video_concatenate(media_urls, job_id, webhook_url=None):
                 concat_file.write(f"file '{os.path.abspath(input_file)}'\n")
 
         # Use the concat demuxer to concatenate the videos
-        (
+        durations = [probe_duration(f) for f in input_files]
+        run_ffmpeg(
             ffmpeg.input(concat_file_path, format='concat', safe=0).
                 output(output_path, c='copy').
-                run(overwrite_output=True)
+                compile(overwrite_output=True),
+            duration=sum(durations) if None not in durations else None
         )
 
         # Clean up input files
@@ -1,14 +1,155 @@
-import requests
+import os
+import time
+import random
 import logging
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from services.sqlite_db import prepare_database, connect, transaction
+from services import fast_json
 
 logger = logging.getLogger(__name__)
 
+# 🔔 Webhook delivery settings
+WEBHOOK_OUTBOX_PATH = os.environ.get('WEBHOOK_OUTBOX_PATH', '/tmp/ciberfobia-api/webhooks.db')
+WEBHOOK_WORKERS = max(int(os.environ.get('WEBHOOK_WORKERS', 4)), 1)  # 🧵 Delivery threads per gunicorn worker
+WEBHOOK_TIMEOUT = float(os.environ.get('WEBHOOK_TIMEOUT', 30))  # ⏱️ Seconds to wait for a receiver to answer
+WEBHOOK_MAX_ATTEMPTS = max(int(os.environ.get('WEBHOOK_MAX_ATTEMPTS', 8)), 1)  # 🔁 Deliveries tried before giving up
+
+CONNECT_TIMEOUT = 5  # ⏱️ Seconds to open the connection to a receiver
+RETRY_BASE_DELAY = 2  # ⏳ First retry delay in seconds, doubled after every failed attempt
+RETRY_MAX_DELAY = 600  # ⏳ Longest wait between two attempts
+FAILED_RETENTION = 7 * 24 * 3600  # 🧹 Seconds undeliverable webhooks are kept for inspection
+POLL_INTERVAL = 1.0  # ⏱️ Seconds between outbox checks when no local webhook was queued
+
+class WebhookDispatcher:
+    """📮 Delivers webhooks from a persisted outbox, so job workers never wait for a receiver"""
+
+    def __init__(self, path, workers=WEBHOOK_WORKERS, timeout=WEBHOOK_TIMEOUT, max_attempts=WEBHOOK_MAX_ATTEMPTS):
+        self.path = path
+        self.workers = workers
+        self.timeout = timeout
+        self.max_attempts = max_attempts
+        self.lease = CONNECT_TIMEOUT + timeout + 30  # 🔒 A claim older than this belongs to a dead worker and is retried
+        self.wakeup = threading.Condition()
+        self.started = False
+
+        # 🔌 Keep-alive connections shared by the delivery threads
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=16, pool_maxsize=workers, max_retries=0)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        prepare_database(path, [
+            """
+            CREATE TABLE IF NOT EXISTS webhook_outbox (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                webhook_url TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                state TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                next_attempt_at REAL NOT NULL,
+                last_error TEXT,
+                created_at REAL NOT NULL
+            )
+            """,
+            "CREATE INDEX IF NOT EXISTS webhook_outbox_due ON webhook_outbox (state, next_attempt_at)"
+        ])
+        with connect(path) as conn:
+            conn.execute("DELETE FROM webhook_outbox WHERE state = 'failed' AND created_at < ?", (time.time() - FAILED_RETENTION,))
+
+    def enqueue(self, webhook_url, data):
+        """📥 Persist a webhook for delivery and wake a delivery thread"""
+        now = time.time()
+        with connect(self.path) as conn:
+            conn.execute(
+                "INSERT INTO webhook_outbox (webhook_url, payload, next_attempt_at, created_at) VALUES (?, ?, ?, ?)",
+                (webhook_url, fast_json.dumps(data), now, now)
+            )
+        with self.wakeup:
+            self.wakeup.notify()
+
+    def _claim(self):
+        """🔒 Lease the next due webhook so no other thread or worker sends it at the same time"""
+        now = time.time()
+        with transaction(self.path) as conn:
+            row = conn.execute(
+                "SELECT seq, webhook_url, payload, attempts FROM webhook_outbox "
+                "WHERE state = 'pending' AND next_attempt_at <= ? ORDER BY next_attempt_at, seq LIMIT 1",
+                (now,)
+            ).fetchone()
+            if row is not None:
+                conn.execute("UPDATE webhook_outbox SET next_attempt_at = ? WHERE seq = ?", (now + self.lease, row[0]))
+        return row
+
+    def _deliver(self, seq, webhook_url, payload, attempts):
+        try:
+            # 🔤 Sent as UTF-8 bytes: payloads written by orjson keep non-ASCII text unescaped
+            response = self.session.post(
+                webhook_url, data=payload.encode(), headers={'Content-Type': 'application/json'},
+                timeout=(CONNECT_TIMEOUT, self.timeout)
+            )
+            response.raise_for_status()
+        except requests.RequestException as e:
+            attempts += 1
+            status = e.response.status_code if e.response is not None else None
+            # 🚫 Client errors other than timeouts and rate limits will not fix themselves
+            permanent = status is not None and 400 <= status < 500 and status not in (408, 429)
+            with connect(self.path) as conn:
+                if permanent or attempts >= self.max_attempts:
+                    conn.execute("UPDATE webhook_outbox SET state = 'failed', attempts = ?, last_error = ? WHERE seq = ?", (attempts, str(e), seq))
+                    logger.error(f"Webhook to {webhook_url} failed after {attempts} attempts, giving up: {e}")
+                else:
+                    delay = min(RETRY_BASE_DELAY * 2 ** (attempts - 1), RETRY_MAX_DELAY) * random.uniform(0.8, 1.2)
+                    conn.execute(
+                        "UPDATE webhook_outbox SET attempts = ?, next_attempt_at = ?, last_error = ? WHERE seq = ?",
+                        (attempts, time.time() + delay, str(e), seq)
+                    )
+                    logger.warning(f"Webhook to {webhook_url} failed (attempt {attempts}), retrying in {delay:.0f}s: {e}")
+            return
+        with connect(self.path) as conn:
+            conn.execute("DELETE FROM webhook_outbox WHERE seq = ?", (seq,))
+        logger.info(f"Webhook sent to {webhook_url} (attempt {attempts + 1})")
+
+    def _run(self):
+        while True:
+            try:
+                row = self._claim()
+            except Exception:
+                logger.exception("Webhook dispatcher failed to read the outbox")
+                row = None
+            if row is None:
+                with self.wakeup:
+                    self.wakeup.wait(POLL_INTERVAL)
+                continue
+            try:
+                self._deliver(*row)
+            except Exception:
+                logger.exception(f"Webhook dispatcher failed to deliver outbox entry {row[0]}")
+
+    def start(self):
+        """🧵 Start the delivery threads; webhooks left in the outbox by a previous run are sent first"""
+        if self.started:
+            return
+        self.started = True
+        for worker_id in range(self.workers):
+            threading.Thread(target=self._run, name=f"webhook-{worker_id}", daemon=True).start()
+
+_dispatcher = None
+_dispatcher_lock = threading.Lock()
+
+def get_webhook_dispatcher():
+    """🔍 Webhook dispatcher of this process, started on first use"""
+    global _dispatcher
+    with _dispatcher_lock:
+        if _dispatcher is None:
+            _dispatcher = WebhookDispatcher(WEBHOOK_OUTBOX_PATH)
+            _dispatcher.start()
+        return _dispatcher
+
 def send_webhook(webhook_url, data):
-    """Send a POST request to a webhook URL with the provided data."""
-    try:
-        logger.info(f"Attempting to send webhook to {webhook_url} with data: {data}")
-        response = requests.post(webhook_url, json=data)
-        response.raise_for_status()
-        logger.info(f"Webhook sent: {data}")
-    except requests.RequestException as e:
-        logger.error(f"Webhook failed: {e}")
+    """Queue a POST of data to a webhook URL; delivery, timeouts and retries happen in the background."""
+    if not webhook_url:
+        return
+    logger.info(f"Queueing webhook to {webhook_url} for job {data.get('job_id')}")
+    get_webhook_dispatcher().enqueue(webhook_url, data)
@@ -0,0 +1,95 @@
+import time
+import importlib
+import logging
+import threading
+from types import SimpleNamespace
+from services.job_context import report_progress, check_cancelled, span
+from services.metrics import record_whisper_load
+
+logger = logging.getLogger(__name__)
+
+_hook_lock = threading.Lock()
+_hook_installed = False
+
+# Models loaded once in the gunicorn master (PRELOAD_WHISPER_MODEL) and inherited copy-on-write by every worker
+_shared_models = {}
+# Whisper installs its kv-cache hooks on the model itself, so a shared model runs one transcription at a time
+_shared_model_locks = {}
+# Set in job pool processes: models loaded by a job stay loaded for the next ones
+_keep_loaded_models = False
+
+class TranscriptionProgress:
+    """Stand-in for the tqdm bar that whisper advances after every decoded 30-second window."""
+
+    def __init__(self, total=None, **kwargs):
+        self.total = total
+        self.frames = 0
+        self.segments = 0
+
+    def __enter__(self):
+        report_progress(stage='transcribe', percent=0, segments=0)
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def update(self, n=1):
+        check_cancelled()  # Stop between windows when the job is cancelled
+        self.frames += n
+        self.segments += 1
+        report_progress(
+            stage='transcribe',
+            percent=self.frames / self.total * 100 if self.total else None,
+            segments=self.segments
+        )
+
+def _install_progress_hook():
+    # Done on first use: importing whisper pulls in torch, which workers that never transcribe should not pay for
+    global _hook_installed
+    with _hook_lock:
+        if _hook_installed:
+            return
+        # whisper/__init__.py shadows the module name with the transcribe() function, so look the module up explicitly
+        whisper_transcribe = importlib.import_module('whisper.transcribe')
+        whisper_transcribe.tqdm = SimpleNamespace(tqdm=TranscriptionProgress)
+        _hook_installed = True
+
+def preload_model(name):
+    """Load a Whisper model once for the whole process; later load_model(name) calls return it instead of loading again."""
+    if name not in _shared_models:
+        import whisper
+        _install_progress_hook()
+        model = whisper.load_model(name)
+        model.eval()
+        _shared_models[name] = model
+        _shared_model_locks[id(model)] = threading.Lock()
+    return _shared_models[name]
+
+@span('load_model')
+def load_model(name):
+    """Load a Whisper model, timing the load for /metrics. A preloaded model is returned as is."""
+    if name in _shared_models:
+        return _shared_models[name]
+    import whisper
+    _install_progress_hook()
+    started = time.time()
+    model = preload_model(name) if _keep_loaded_models else whisper.load_model(name)
+    record_whisper_load(name, time.time() - started)
+    return model
+
+def keep_loaded_models():
+    """Keep every model this process loads for later jobs, as the job pool processes do."""
+    global _keep_loaded_models
+    _keep_loaded_models = True
+
+@span('transcribe')
+def transcribe(model, media_path, **options):
+    """Run model.transcribe() reporting the decoded share of the audio as job progress."""
+    _install_progress_hook()
+    check_cancelled()
+    report_progress(stage='transcribe')
+    lock = _shared_model_locks.get(id(model))
+    if lock is None:
+        return model.transcribe(media_path, **options)
+    with lock:
+        return model.transcribe(media_path, **options)
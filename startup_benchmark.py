@@ -0,0 +1,72 @@
+import os
+import sys
+import time
+import argparse
+import tempfile
+import subprocess
+from pathlib import Path
+
+# 🗄️ Databases the app opens at startup, pointed at a scratch directory so the benchmark never touches real data
+DATABASE_VARIABLES = {
+    'JOB_STORE_PATH': 'jobs.db',
+    'QUEUE_BROKER_PATH': 'queue.db',
+    'WEBHOOK_OUTBOX_PATH': 'webhooks.db',
+    'RESULT_CACHE_PATH': 'results.db',
+    'METRICS_PATH': 'metrics.db',
+}
+
+def run_import(scratch_dir):
+    """⏱️ Import app.py in a fresh interpreter with -X importtime; returns (wall seconds, importtime lines)"""
+    env = dict(os.environ)
+    env.setdefault('API_KEY', 'startup-benchmark')
+    for variable, filename in DATABASE_VARIABLES.items():
+        env[variable] = os.path.join(scratch_dir, filename)
+
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import app'],
+        cwd=Path(__file__).parent, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True
+    )
+    wall_time = time.perf_counter() - started
+    if result.returncode != 0:
+        errors = [line for line in result.stderr.splitlines() if not line.startswith('import time:')]
+        print("❌ Error: importing app failed:\n" + "\n".join(errors[-20:]), file=sys.stderr)
+        sys.exit(1)
+    return wall_time, [line for line in result.stderr.splitlines() if line.startswith('import time:')]
+
+def parse_importtime(lines):
+    """🔍 (module, depth, self µs, cumulative µs) for every line of -X importtime output"""
+    modules = []
+    for line in lines[1:]:  # ⏭️ Skip the header row
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip()) - 1) // 2  # 🪜 app itself is depth 0, what it imports depth 1
+        modules.append((name.strip(), depth, int(self_us), int(cumulative_us)))
+    return modules
+
+def main():
+    """🚀 Report how long a worker takes to import the app and which modules cost the most"""
+    parser = argparse.ArgumentParser(description="Measure worker startup time and the import cost of each module.")
+    parser.add_argument('--top', type=int, default=25, help="number of modules to list (default: 25)")
+    parser.add_argument('--runs', type=int, default=3, help="imports to run; the fastest one is reported (default: 3)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as scratch_dir:
+        runs = [run_import(scratch_dir) for _ in range(max(args.runs, 1))]
+    wall_time, lines = min(runs)
+    modules = parse_importtime(lines)
+
+    # 📦 Everything app.py and create_app import directly, each counted with what it imported in turn
+    top_level = [module for module in modules if module[1] == 1]
+    own = [module for module in modules if module[0].split('.')[0] in ('app', 'app_utils', 'blueprints', 'config', 'routes', 'services')]
+
+    print(f"⏱️ Startup (interpreter + import app + create_app): {wall_time * 1000:.0f} ms, fastest of {len(runs)} runs")
+    print(f"📦 Modules imported: {len(modules)}")
+    print("\n🐢 Slowest imports made by app.py (cumulative):")
+    for name, _, _, cumulative_us in sorted(top_level, key=lambda module: module[3], reverse=True)[:args.top]:
+        print(f"  {cumulative_us / 1000:9.1f} ms  {name}")
+    print("\n🧩 App modules (self time, excluding their imports):")
+    for name, _, self_us, _ in sorted(own, key=lambda module: module[2], reverse=True)[:args.top]:
+        print(f"  {self_us / 1000:9.1f} ms  {name}")
+
+if __name__ == '__main__':
+    main()